@@ -1,4 +1,7 @@
+import collections
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils.datastructures import MultiValueDictKeyError
 from rest_auth.registration.views import RegisterView
 from rest_framework import generics
@@ -17,7 +20,8 @@ from talent.models import WishList, Talent, Registration
 from talent.serializers import TalentShortInfoSerializer, \
     MyRegistrationSerializer, MyPageWrapperSerializer, \
     MyApplicantsSerializer
-from utils import verify_instance, LargeResultsSetPagination
+from utils import verify_instance, LargeResultsSetPagination, KeysetPagination, rendered_fields
+from utils.cache_version import TALENT_CATALOG, bump_cache_version
 from utils.remove_all_but_numbers import remove_non_numeric
 
 __all__ = (
@@ -36,19 +40,34 @@ __all__ = (
     'StaffUserVerifyTutorView',
     'StaffUserVerifyTalentView',
     'TutorVerifyRegistrationView',
+    'TutorBulkVerifyRegistrationView',
     'MyPageView',
 )
 
 User = get_user_model()
 
 
+def with_registration_info(registrations, fields):
+    """
+    신청서 리스트 serializer가 출력할 필드에 맞춰 location / talent / tutor를 join 한다.
+    """
+    related = []
+    if 'registered_location' in fields:
+        related.append('talent_location')
+    if 'talent' in fields:
+        related.extend(['talent_location__talent', 'talent_location__talent__rating_stats'])
+    if 'tutor_info' in fields:
+        related.append('talent_location__talent__tutor__user')
+    return registrations.select_related(*related) if related else registrations
+
+
 # ##### 일반 유저 관련 #####
 class UserProfileView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request, format=None):
         user = request.user
-        serializer = UserSerializer(user)
+        serializer = UserSerializer(user, context={'request': request})
         return Response(serializer.data)
 
     def patch(self, request, *args, **kwargs):
@@ -143,8 +162,75 @@ class TutorVerifyRegistrationView(APIView):
             return Response(status=status.HTTP_401_UNAUTHORIZED, data={"detail": "해당 요청에 대한 권한이 없습니다."})
 
 
+class TutorBulkVerifyRegistrationView(APIView):
+    """
+    tutor가 자기 수업의 수강신청 여러 개를 한 번에 승인(취소)한다.
+
+    필수정보 :
+        - ids : 수강신청 아이디 목록 (최대 100개)
+        - is_verified : 바꿀 상태 (true: 승인, false: 승인 취소)
+    응답의 results에는 id별 결과가 담긴다.
+        - updated : 상태를 바꿈
+        - unchanged : 이미 요청한 상태
+        - not_found : 없거나 내 수업의 신청이 아님
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    max_ids = 100
+
+    def post(self, request):
+        tutor = getattr(request.user, 'tutor', None)
+        if tutor is None:
+            return Response(status=status.HTTP_401_UNAUTHORIZED, data={"detail": "해당 요청에 대한 권한이 없습니다."})
+
+        ids = request.data.get('ids', [])
+        if isinstance(ids, str):
+            ids = ids.split(',')
+        try:
+            ids = [int(item) for item in ids if str(item).strip()]
+        except (TypeError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": "ids에는 숫자만 입력해주세요."})
+        ids = list(collections.OrderedDict.fromkeys(ids))
+        if not ids:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": "ids를 입력해주세요."})
+        if len(ids) > self.max_ids:
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={"detail": "ids는 최대 {}개까지 입력할 수 있습니다.".format(self.max_ids)})
+
+        is_verified = request.data.get('is_verified')
+        if isinstance(is_verified, str):
+            is_verified = {'true': True, 'false': False}.get(is_verified.lower())
+        if not isinstance(is_verified, bool):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": "is_verified는 true 또는 false 입니다."})
+
+        # 내 수업의 신청서만 (join 한 번으로 소유 확인)
+        registrations = Registration.objects.filter(pk__in=ids, talent_location__talent__tutor=tutor)
+        current = dict(registrations.values_list('pk', 'is_verified'))
+        updated = [pk for pk in ids if pk in current and current[pk] != is_verified]
+        if updated:
+            with transaction.atomic():
+                # UPDATE 한 번. 조건에 소유 확인과 현재 상태를 다시 넣어 다른 요청과 겹쳐도 남의 신청서는 바뀌지 않는다.
+                registrations.filter(pk__in=updated).exclude(is_verified=is_verified).update(is_verified=is_verified)
+                # 하나씩 저장할 때 signal이 하던 ETag / 목록 캐시 갱신
+                Talent.objects.filter(locations__registrations__pk__in=updated).bump_content_version()
+            bump_cache_version(TALENT_CATALOG)
+
+        results = collections.OrderedDict()
+        for pk in ids:
+            if pk not in current:
+                results[str(pk)] = 'not_found'
+            elif pk in updated:
+                results[str(pk)] = 'updated'
+            else:
+                results[str(pk)] = 'unchanged'
+        return Response(status=status.HTTP_200_OK, data={
+            'is_verified': is_verified,
+            'results': results,
+        })
+
+
 class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all()
+    # UserSerializer의 카운터 필드를 join 으로 함께 읽는다.
+    queryset = User.objects.select_related('activity_counters')
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = UserSerializer
 
@@ -155,7 +241,7 @@ class TutorProfileView(APIView):
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        serializer = TutorSerializer(Tutor.objects.get(user_id=user.id))
+        serializer = TutorSerializer(Tutor.objects.get(user_id=user.id), context={'request': request})
         return Response(serializer.data)
 
 
@@ -251,12 +337,13 @@ class RegisterTutorView(APIView):
 class MyWishListView(generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = TalentShortInfoSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
-        talents = Talent.objects.filter(wishlist_user=user)
-        return talents.all()
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        talents = Talent.objects.with_list_info(fields).filter(wishlist_user=user)
+        return talents
 
 
 # ##### 유저가 wishlist에 담기/빼기 #####
@@ -274,7 +361,9 @@ class WishListToggleView(APIView):
                     return Response(status=status.HTTP_200_OK,
                                     data={'detail': '수업 [{}]이(가) wishlist에서 삭제되었습니다.'.format(talent.title)})
                 else:
-                    WishList.objects.create(user=user, talent=talent)
+                    # 위시리스트 저장과 카운터 갱신(talent.signals)을 한 transaction으로
+                    with transaction.atomic():
+                        WishList.objects.create(user=user, talent=talent)
                     return Response(status=status.HTTP_201_CREATED,
                                     data={'detail': '수업 [{}]이(가) wishlist에 추가되었습니다.'.format(talent.title)})
             else:
@@ -294,12 +383,12 @@ class WishListToggleView(APIView):
 class MyRegistrationView(generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = MyRegistrationSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
         registrations = Registration.objects.filter(student=user).filter(is_verified=False)
-        return registrations.all()
+        return with_registration_info(registrations, rendered_fields(self.request, self.get_serializer_class()))
 
 
 class MyEnrolledTalentView(generics.ListAPIView):
@@ -310,7 +399,7 @@ class MyEnrolledTalentView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         registrations = Registration.objects.filter(student=user).filter(is_verified=True)
-        return registrations.all()
+        return with_registration_info(registrations, rendered_fields(self.request, self.get_serializer_class()))
 
 
 class MyTalentsView(generics.ListAPIView):
@@ -319,21 +408,34 @@ class MyTalentsView(generics.ListAPIView):
     pagination_class = LargeResultsSetPagination
 
     def get_queryset(self):
-        talents = Talent.objects.filter(tutor__user=self.request.user)
-        return talents.all()
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        talents = Talent.objects.with_list_info(fields).filter(tutor__user=self.request.user)
+        return talents
 
 
 class MyApplicantsView(generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = MyApplicantsSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        user = self.request.user
-        registrations = []
-        for talent in user.tutor.talent_set.all():
-            registrations.extend([item for item in Registration.objects.filter(talent_location__talent=talent)])
-        return registrations
+        """
+        tutor의 모든 수업에 대한 수강신청서를 queryset 하나로 만든다. (페이지 단위로 DB에서 읽음)
+        ?is_verified=true|false : 승인 여부로 거르기
+        ?talent=<pk> : 특정 수업의 신청서만
+        """
+        tutor = getattr(self.request.user, 'tutor', None)
+        if tutor is None:
+            return Registration.objects.none()
+        registrations = Registration.objects.filter(talent_location__talent__tutor=tutor)
+
+        is_verified = self.request.query_params.get('is_verified', None)
+        if is_verified in ('true', 'false'):
+            registrations = registrations.filter(is_verified=is_verified == 'true')
+        talent = self.request.query_params.get('talent', None)
+        if talent and talent.isdigit():
+            registrations = registrations.filter(talent_location__talent_id=talent)
+        return with_registration_info(registrations, rendered_fields(self.request, self.get_serializer_class()))
 
 
 class MyPageView(APIView):
@@ -341,5 +443,5 @@ class MyPageView(APIView):
 
     def get(self, request):
         user = User.objects.get(id=request.user.id)
-        serializer = MyPageWrapperSerializer(user)
+        serializer = MyPageWrapperSerializer(user, context={'request': request})
         return Response(serializer.data)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from member.models import UserActivityCounters
+from talent.models import Talent, Location, Registration, WishList, Review
+
+
+class Command(BaseCommand):
+    help = '사용자 활동 카운터(UserActivityCounters)를 원본 테이블에서 INSERT ... ON CONFLICT 한 번으로 다시 계산한다.'
+
+    def handle(self, *args, **options):
+        tables = {
+            'user': get_user_model()._meta.db_table,
+            'counters': UserActivityCounters._meta.db_table,
+            'talent': Talent._meta.db_table,
+            'location': Location._meta.db_table,
+            'registration': Registration._meta.db_table,
+            'wishlist': WishList._meta.db_table,
+            'review': Review._meta.db_table,
+        }
+        # Tutor의 pk가 user id이므로 talent.tutor_id로 바로 사용자와 연결된다.
+        sql = (
+            'INSERT INTO {counters} (user_id, sent_registration_count, received_registration_count, '
+            'wishlist_count, talent_count, review_count) '
+            'SELECT {user}.id, '
+            '(SELECT COUNT(*) FROM {registration} WHERE {registration}.student_id = {user}.id), '
+            '(SELECT COUNT(*) FROM {registration} '
+            'INNER JOIN {location} ON {registration}.talent_location_id = {location}.id '
+            'INNER JOIN {talent} ON {location}.talent_id = {talent}.id '
+            'WHERE {talent}.tutor_id = {user}.id), '
+            '(SELECT COUNT(*) FROM {wishlist} WHERE {wishlist}.user_id = {user}.id), '
+            '(SELECT COUNT(*) FROM {talent} WHERE {talent}.tutor_id = {user}.id), '
+            '(SELECT COUNT(*) FROM {review} WHERE {review}.user_id = {user}.id) '
+            'FROM {user} '
+            'ON CONFLICT (user_id) DO UPDATE SET '
+            'sent_registration_count = EXCLUDED.sent_registration_count, '
+            'received_registration_count = EXCLUDED.received_registration_count, '
+            'wishlist_count = EXCLUDED.wishlist_count, '
+            'talent_count = EXCLUDED.talent_count, '
+            'review_count = EXCLUDED.review_count'
+        ).format(**tables)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql)
+            count = cursor.rowcount
+        self.stdout.write('사용자 {}명의 활동 카운터를 다시 계산했습니다.'.format(count))
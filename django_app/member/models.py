@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import models
+from django.db.models import F
 
 
 class CustomUserManager(BaseUserManager):
@@ -102,3 +103,48 @@ class Tutor(models.Model):
 
     def __str__(self):
         return self.user.name
+
+
+class UserActivityCountersManager(models.Manager):
+    def increment(self, user_id, field, amount=1):
+        """
+        카운터 하나를 F() 로 증감한다. (talent.signals에서 원본 저장/삭제와 같은 transaction 안에서 호출)
+        row가 없으면 증가할 때만 만든다. 사용자 삭제 중(cascade)의 감소로 row가 다시 생기지 않도록 하기 위함
+        """
+        if self.filter(user_id=user_id).update(**{field: F(field) + amount}) or amount <= 0:
+            return
+        self.get_or_create(user_id=user_id)
+        self.filter(user_id=user_id).update(**{field: F(field) + amount})
+
+
+class UserActivityCounters(models.Model):
+    """
+    마이페이지 / 프로필에 보여주는 사용자별 개수.
+    UserSerializer가 수강신청, 위시리스트 등을 매번 세지 않고 이 row 하나만 읽는다.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, related_name='activity_counters')
+    # 내가 보낸 수강신청
+    sent_registration_count = models.IntegerField(default=0)
+    # 내 수업에 들어온 수강신청
+    received_registration_count = models.IntegerField(default=0)
+    wishlist_count = models.IntegerField(default=0)
+    talent_count = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+
+    objects = UserActivityCountersManager()
+
+    def __str__(self):
+        return 'User : {}'.format(self.user_id)
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        활동이 없어 row가 없는 사용자는 0으로 채워진 (저장되지 않은) 객체를 돌려준다.
+        """
+        try:
+            return user.activity_counters
+        except ObjectDoesNotExist:
+            counters = cls(user_id=user.pk)
+            # 없는 row를 항목마다 다시 조회하지 않도록 user에 담아둔다.
+            user.activity_counters = counters
+            return counters
@@ -1,8 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from member.models import Tutor
-from talent.models import Location
+from member.models import Tutor, UserActivityCounters
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 
 __all__ = (
     'UserSerializer',
@@ -13,13 +13,15 @@ __all__ = (
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsModelSerializer):
     user_type = serializers.SerializerMethodField(read_only=True)
     user_id = serializers.CharField(
         read_only=True, source='username')
     received_registrations = serializers.SerializerMethodField(read_only=True)
     sent_registrations = serializers.SerializerMethodField(read_only=True)
     wish_list = serializers.SerializerMethodField()
+    talent_count = serializers.SerializerMethodField(read_only=True)
+    review_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = User
@@ -40,6 +42,8 @@ class UserSerializer(serializers.ModelSerializer):
             'received_registrations',
             'sent_registrations',
             'wish_list',
+            'talent_count',
+            'review_count',
         )
         read_only_fields = ('is_active', 'is_staff', 'user_type', 'is_tutor', 'joined_date', 'last_login')
 
@@ -50,50 +54,28 @@ class UserSerializer(serializers.ModelSerializer):
     @staticmethod
     def get_received_registrations(obj):
         """
-        location가 참조하는 talent의 tutor_id가
-        현재 obj(로그인 유저)와 일치하는 지 판단
-        즉, location이 현재 유저의 것인지 판단.
-
-        해당 location의 registered_student 목록을 받아온다.
-        목록을 리스트로 변환하고, none 객체를 제거한다.
-        (아무도 등록하지 않은 location의 경우 none을 반환한다.)
-
-        목록의 카운트를 반환한다.
-
-        :param obj: request.user
-        :return:
+        내 수업에 들어온 수강신청 수 (UserActivityCounters, 수강신청 저장/삭제 시 갱신)
         """
-        registered_students = Location.objects.filter(talent__tutor_id=obj.id).values_list('registered_student',
-                                                                                           flat=True)
-        list_registered_students = list(registered_students)
-        while True:
-            try:
-                list_registered_students.remove(None)
-            except:
-                break
-        return len(list_registered_students)
+        return UserActivityCounters.for_user(obj).received_registration_count
 
     @staticmethod
     def get_sent_registrations(obj):
         """
-        location을 순회하면서 registered_student에 현재 유저가 있는지 체크한다.
-        있을 경우 리스트에 해당 수업을 추가하고 최종적으로 리스트의 길이를 반환한다.
+        내가 보낸 수강신청 수
         """
-        locations = Location.objects.all()
-        count = 0
-        for location in locations:
-            if obj.id in location.registered_student.values_list('id', flat=True):
-                count += 1
-        return count
+        return UserActivityCounters.for_user(obj).sent_registration_count
 
     @staticmethod
     def get_wish_list(obj):
-        # talents = Talent.objects.all()
-        # count = 0
-        # for talent in talents:
-        #     if obj.id in talent.wishlist_user.values_list('id', flat=True):
-        #         count += 1
-        return obj.my_wishlist.count()
+        return UserActivityCounters.for_user(obj).wishlist_count
+
+    @staticmethod
+    def get_talent_count(obj):
+        return UserActivityCounters.for_user(obj).talent_count
+
+    @staticmethod
+    def get_review_count(obj):
+        return UserActivityCounters.for_user(obj).review_count
 
     def create(self, validated_data):
         user = User.objects.create(
@@ -105,27 +87,6 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class DynamicFieldsModelSerializer(serializers.ModelSerializer):
-    """
-    A ModelSerializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
-    """
-
-    def __init__(self, *args, **kwargs):
-        # Don't pass the 'fields' arg up to the superclass
-        fields = kwargs.pop('fields', None)
-
-        # Instantiate the superclass normally
-        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
-
-        if fields:
-            # Drop any fields that are not specified in the `fields` argument.
-            allowed = set(fields)
-            existing = set(self.fields.keys())
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
-
-
 class TutorSerializer(DynamicFieldsModelSerializer):
     user_id = serializers.CharField(
         read_only=True, source='user.username')
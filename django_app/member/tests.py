@@ -1,9 +1,13 @@
+import os
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.reverse import reverse
 from rest_framework.test import APILiveServerTestCase
 
+from talent.models import Registration
 from utils import APITestUserLogin
 
 User = get_user_model()
@@ -198,4 +202,82 @@ class UserWishlistTest(APILiveServerTestCase, APITestUserLogin):
         params = {
             'pk': talent.pk
         }
-        wishlist_url = reverse('api:talent:wishlist-toggle', kwargs=params)
\ No newline at end of file
+        wishlist_url = reverse('api:talent:wishlist-toggle', kwargs=params)
+
+
+class UserActivityCountersTest(APILiveServerTestCase, APITestUserLogin):
+    def test_counters_follow_writes(self):
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[1], tokens[1])
+        talent = self.create_talent(tutor, tokens[1])
+        location = self.create_location(talent, tokens[1])
+        wishlist_url = reverse('api:talent:wishlist-toggle', kwargs={'pk': talent.pk})
+        self.client.get(wishlist_url, HTTP_AUTHORIZATION='Token ' + tokens[0])
+        self.create_registration(location, tokens[0])
+        self.create_review(talent, tokens[0])
+
+        url = reverse('api:member:user-detail')
+        # 토큰, 사용자, 카운터를 join 한 인증 쿼리 하나로 응답한다.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[0])
+        self.assertEqual(response.data['sent_registrations'], 1)
+        self.assertEqual(response.data['wish_list'], 1)
+        self.assertEqual(response.data['review_count'], 1)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.data['received_registrations'], 1)
+        self.assertEqual(response.data['talent_count'], 1)
+
+        # 일괄 재계산 결과가 증분 갱신 결과와 같아야 한다.
+        expected = response.data
+        call_command('reconcile_user_counters', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1]).data, expected)
+
+        # 수업을 지우면 연결된 위시리스트 / 수강신청 / 리뷰도 함께 줄어든다.
+        talent.delete()
+        response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[0])
+        self.assertEqual(response.data['sent_registrations'], 0)
+        self.assertEqual(response.data['wish_list'], 0)
+        self.assertEqual(response.data['review_count'], 0)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.data['received_registrations'], 0)
+        self.assertEqual(response.data['talent_count'], 0)
+
+
+class TutorBulkVerifyRegistrationTest(APILiveServerTestCase, APITestUserLogin):
+    def test_bulk_verify_registrations(self):
+        users, tokens = self.obtain_token(4)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        registrations = [
+            Registration.objects.create(student=student, talent_location=location, message_to_tutor='test')
+            for student in users[1:]
+        ]
+        registrations[2].is_verified = True
+        registrations[2].save()
+        ids = [registration.pk for registration in registrations] + [999999]
+
+        url = reverse('api:member:registration-bulk-verify')
+        response = self.client.post(url, {'ids': ids, 'is_verified': True}, format='json',
+                                    HTTP_AUTHORIZATION='Token ' + tokens[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'].values()), ['updated', 'updated', 'unchanged', 'not_found'])
+        self.assertEqual(Registration.objects.filter(pk__in=ids, is_verified=True).count(), 3)
+
+        # 튜터가 아니면 401
+        response = self.client.post(url, {'ids': ids, 'is_verified': False}, format='json',
+                                    HTTP_AUTHORIZATION='Token ' + tokens[2])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Registration.objects.filter(pk__in=ids, is_verified=True).count(), 3)
+
+        # 다른 튜터의 수업 신청서는 not_found로 두고 바꾸지 않는다.
+        self.register_tutor(users[1], tokens[1])
+        response = self.client.post(url, {'ids': ids, 'is_verified': False}, format='json',
+                                    HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'].values()), ['not_found'] * len(ids))
+        self.assertEqual(Registration.objects.filter(pk__in=ids, is_verified=True).count(), 3)
+
+        response = self.client.post(url, {'ids': 'a,b', 'is_verified': True}, format='json',
+                                    HTTP_AUTHORIZATION='Token ' + tokens[0])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
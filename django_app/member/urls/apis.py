@@ -27,6 +27,7 @@ urlpatterns = [
 
     # ##### tutor가 수업신청 인증 (취소) #####
     url(r'^verify/registration/(?P<registration_pk>[0-9]+)/$', apis.TutorVerifyRegistrationView.as_view(),name='registration-verify' ),
+    url(r'^verify/registrations/$', apis.TutorBulkVerifyRegistrationView.as_view(), name='registration-bulk-verify'),
 
     # ##### 로그인/로그아웃 #####
     url(r'^fb_login/$', apis.CreateFacebookUserView.as_view()),
@@ -37,7 +38,7 @@ urlpatterns = [
     url(r'^registrations/$', apis.MyRegistrationView.as_view()),
     url(r'^enrollment/$', apis.MyEnrolledTalentView.as_view()),
     url(r'^talents/$', apis.MyTalentsView.as_view()),
-    url(r'^applicants/$', apis.MyApplicantsView.as_view()),
+    url(r'^applicants/$', apis.MyApplicantsView.as_view(), name='my-applicants'),
     url(r'^my-page/$', apis.MyPageView.as_view()),
 
     # ##### 튜터 등록 #####
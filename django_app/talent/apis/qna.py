@@ -22,13 +22,22 @@ __all__ = (
 class QuestionListCreateView(generics.ListCreateAPIView):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
     filter_backends = (OrderingFilter,)
+    # cursor 페이지네이션 기준으로 쓸 수 있는 컬럼만 (?ordering=user 처럼 관련 객체로 정렬하지 않도록)
+    ordering_fields = ('pk', 'created_date')
     ordering = ('-pk',)
 
     def get_queryset(self):
-        return Question.objects.filter(talent_id=self.kwargs['pk'])
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        queryset = Question.objects.filter(talent_id=self.kwargs['pk'])
+        if 'replies' in fields:
+            # 질문 작성자 join + 답변/튜터 prefetch. 질문, 답변 수와 관계없이 쿼리 2번
+            return queryset.with_replies()
+        if 'user' in fields or 'user_image' in fields:
+            queryset = queryset.select_related('user')
+        return queryset
 
     def create(self, request, *args, **kwargs):
         """
@@ -1,9 +1,11 @@
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
+from talent.models import IdempotencyKey
 from talent.serializers import RegistrationUpdateSerializer
 from talent.serializers.registration import TalentRegistrationSerializer, TalentRegistrationCreateSerializer
 from utils import *
@@ -69,7 +71,19 @@ class RegistrationListCreateView(generics.ListCreateAPIView):
         추가정보 :
             - student_level : 학생 레벨
             - experience_length : 경력 (개월수)
+        헤더 :
+            - Idempotency-Key : 재전송해도 한 번만 신청되도록 하는 요청 키.
+              같은 키로 다시 보내면 저장된 응답을 그대로 돌려준다.
         """
+        idempotency_key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if idempotency_key:
+            if len(idempotency_key) > IdempotencyKey.MAX_LENGTH:
+                return Response({'detail': 'Idempotency-Key는 {}자 이하여야 합니다.'.format(IdempotencyKey.MAX_LENGTH)},
+                                status=status.HTTP_400_BAD_REQUEST)
+            replay = self.replay_response(request.user, idempotency_key)
+            if replay is not None:
+                return replay
+
         request.data['user'] = request.user.id
 
         # 생성 전용 시리얼라이저 사용
@@ -84,20 +98,55 @@ class RegistrationListCreateView(generics.ListCreateAPIView):
         if verify_tutor(request, talent):
             return Response(talent_owner_error, status=status.HTTP_400_BAD_REQUEST)
 
-        # ##### 이미 등록되었는지 #####
-        data = {
-            'student': request.user,
-            'talent_location': location,
-        }
-        if verify_duplicate(Registration, data=data):
-            return Response(multiple_item_error, status=status.HTTP_400_BAD_REQUEST)
+        # ##### 이미 정원이 찼으면 저장하지 않고 거절 #####
+        if location.seats_taken >= talent.max_number_student:
+            return Response(class_full_error, status=status.HTTP_400_BAD_REQUEST)
         # ##### 추가 검증 끝 #####
 
-        self.perform_create(serializer)
+        # 이미 등록되었는지는 따로 조회하지 않고 (student, talent_location) unique 제약으로 확인한다.
+        try:
+            if not self.perform_create(serializer, idempotency_key):
+                return Response(class_full_error, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            # 같은 키의 요청이 동시에 처리되어 먼저 저장된 경우 그 응답을 돌려준다.
+            replay = self.replay_response(request.user, idempotency_key) if idempotency_key else None
+            if replay is not None:
+                return replay
+            return Response(multiple_item_error, status=status.HTTP_400_BAD_REQUEST)
         headers = self.get_success_headers(serializer.data)
 
         return Response(success_msg, status=status.HTTP_201_CREATED, headers=headers)
 
+    @staticmethod
+    def replay_response(user, idempotency_key):
+        stored = IdempotencyKey.objects.filter(user=user, key=idempotency_key).first()
+        if stored is None:
+            return None
+        return Response(stored.response, status=stored.status_code)
+
+    def perform_create(self, serializer, idempotency_key=None):
+        """
+        자리 예약(조건부 UPDATE), 수강신청 저장, Idempotency-Key 응답 저장을 한 transaction으로 처리한다.
+        이 transaction이 잡는 row lock은 장소 row 하나뿐이다.
+        수업 / 튜터 카운터와 매진 표시는 commit 후에 갱신해서(talent.signals) 같은 수업의 신청끼리 줄을 서지 않는다.
+        :return: 자리가 없어서 저장하지 않았으면 False
+        :raise IntegrityError: 이미 신청한 장소 (자리 예약도 함께 rollback)
+        """
+        location = serializer.validated_data['talent_location']
+        with transaction.atomic():
+            if not Location.objects.reserve_seat(location.pk, location.talent.max_number_student):
+                return False
+            serializer.save()
+            transaction.on_commit(lambda: Talent.objects.filter(pk=location.talent_id).mark_soldout_if_full())
+            if idempotency_key:
+                IdempotencyKey.objects.create(
+                    user=serializer.validated_data['student'],
+                    key=idempotency_key,
+                    status_code=status.HTTP_201_CREATED,
+                    response=success_msg,
+                )
+        return True
+
 
 class RegistrationUpdateView(generics.UpdateAPIView):
     queryset = Registration.objects.all()
@@ -112,7 +161,11 @@ class RegistrationUpdateView(generics.UpdateAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        location = serializer.validated_data.get('talent_location')
+        if location is not None and location.talent_id != instance.talent_location.talent_id:
+            return Response(other_talent_location_error, status=status.HTTP_400_BAD_REQUEST)
+        if not self.perform_update(serializer):
+            return Response(class_full_error, status=status.HTTP_400_BAD_REQUEST)
 
         if getattr(instance, '_prefetched_objects_cache', None):
             # If 'prefetch_related' has been applied to a queryset, we need to
@@ -121,6 +174,25 @@ class RegistrationUpdateView(generics.UpdateAPIView):
 
         return Response(status=status.HTTP_200_OK, data=success_update)
 
+    def perform_update(self, serializer):
+        """
+        다른 장소로 옮기면 새 장소의 자리를 예약하고 원래 장소의 자리를 돌려준다.
+        (같은 수업 안에서만 옮기므로 수업 / 튜터의 수강신청 카운터는 그대로)
+        :return: 새 장소에 자리가 없어서 저장하지 않았으면 False
+        """
+        old_location_id = serializer.instance.talent_location_id
+        location = serializer.validated_data.get('talent_location')
+        with transaction.atomic():
+            serializer.save()
+            if location is None or location.pk == old_location_id:
+                return True
+            if not Location.objects.reserve_seat(location.pk, location.talent.max_number_student):
+                transaction.set_rollback(True)
+                return False
+            Location.objects.release_seat(old_location_id)
+            transaction.on_commit(lambda: Talent.objects.filter(pk=location.talent_id).mark_soldout_if_full())
+        return True
+
 
 class RegistrationDeleteView(generics.DestroyAPIView):
     queryset = Registration.objects.all()
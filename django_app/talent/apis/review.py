@@ -1,31 +1,39 @@
 from __future__ import unicode_literals
 
+from django.db import IntegrityError, transaction
 from django.utils.datastructures import MultiValueDictKeyError
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
-from talent.serializers import ReviewSerializer, ReviewCreateSerializer, ReviewUpdateSerializer
+from talent.serializers import ReviewSerializer, ReviewCreateSerializer, ReviewUpdateSerializer, \
+    ReviewStatsSerializer
 from utils import *
 
 __all__ = (
     'ReviewListCreateView',
     'ReviewDeleteView',
     'ReviewUpdateView',
+    'ReviewStatsView',
 )
 
 
 class ReviewListCreateView(generics.ListCreateAPIView):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
     filter_backends = (OrderingFilter,)
+    # cursor 페이지네이션 기준으로 쓸 수 있는 컬럼만 (?ordering=user 처럼 관련 객체로 정렬하지 않도록)
+    ordering_fields = ('pk', 'created_date')
     ordering = ('-pk',)
 
     def get_queryset(self):
-        return Review.objects.filter(talent_id=self.kwargs['pk'])
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        related = [name for name in ('talent', 'user') if name in fields]
+        queryset = Review.objects.filter(talent_id=self.kwargs['pk'])
+        return queryset.select_related(*related) if related else queryset
 
     def create(self, request, *args, **kwargs):
         """
@@ -61,21 +69,22 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         if verify_tutor(request, talent):
             return Response(talent_owner_error, status=status.HTTP_400_BAD_REQUEST)
 
-        # ##### 이미 리뷰가 존재하면 등록 불가능#####
-        data = {
-            'talent': talent,
-            'user': request.user,
-        }
-        if verify_duplicate(Review, data=data):
-            return Response(multiple_item_error, status=status.HTTP_400_BAD_REQUEST)
-
         # ##### 추가 검증 끝  #####
 
-        self.perform_create(serializer)
+        # 이미 리뷰가 있는지는 따로 조회하지 않고 (talent, user) unique 제약으로 확인한다.
+        try:
+            self.perform_create(serializer)
+        except IntegrityError:
+            return Response(multiple_item_error, status=status.HTTP_400_BAD_REQUEST)
         headers = self.get_success_headers(serializer.data)
 
         return Response(success_msg, status=status.HTTP_201_CREATED, headers=headers)
 
+    def perform_create(self, serializer):
+        # 리뷰 저장과 평점 통계 갱신(talent.signals)을 한 transaction으로
+        with transaction.atomic():
+            serializer.save()
+
 
 class ReviewUpdateView(generics.UpdateAPIView):
     queryset = Review.objects.all()
@@ -99,6 +108,11 @@ class ReviewUpdateView(generics.UpdateAPIView):
 
         return Response(status=status.HTTP_200_OK, data=success_update)
 
+    def perform_update(self, serializer):
+        # 리뷰 저장과 평점 통계 갱신(talent.signals)을 한 transaction으로
+        with transaction.atomic():
+            serializer.save()
+
 
 class ReviewDeleteView(generics.DestroyAPIView):
     queryset = Review.objects.all()
@@ -106,3 +120,12 @@ class ReviewDeleteView(generics.DestroyAPIView):
 
     def get_queryset(self):
         return Review.objects.filter(pk=self.kwargs['pk'], user=self.request.user)
+
+
+class ReviewStatsView(generics.RetrieveAPIView):
+    """
+    수업의 평점 요약과 항목별 별점 분포 (1 ~ 5점 리뷰 수)
+    리뷰를 읽지 않고 리뷰 저장 시 갱신되는 TalentRatingStats row 하나만 조회한다.
+    """
+    queryset = Talent.objects.select_related('rating_stats')
+    serializer_class = ReviewStatsSerializer
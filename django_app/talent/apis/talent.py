@@ -1,4 +1,13 @@
+import collections
+import hashlib
+import json
+
+from django.contrib.postgres.search import SearchRank, TrigramSimilarity
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import DecimalField, F
+from django.db.models.functions import Cast
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.filters import OrderingFilter
@@ -6,17 +15,23 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from member.serializers import UserSerializer
+from talent.facets import talent_facets
+from talent.models import TalentSearchDocument, WishList, Registration
 from talent.serializers import TalentDetailSerializer, TalentCreateSerializer
-from talent.serializers import TalentListSerializer, TalentShortDetailSerializer
+from talent.serializers import TalentListSerializer, TalentShortDetailSerializer, TalentShortInfoSerializer
 from utils import *
+from utils.ordering import SearchRankOrderingFilter
 
 __all__ = (
     'TalentListCreateView',
     'UnverifiedTalentListView',
+    'TalentSuggestView',
+    'TrendingTalentListView',
     # detail - all
     'TalentDetailView',
     # detail - fragments
     'TalentShortDetailView',
+    'TalentBatchView',
     'TalentSalesStatusToggleView',
     'TalentDeleteView',
 )
@@ -28,9 +43,22 @@ User = get_user_model()
 class TalentListCreateView(generics.ListCreateAPIView):
     serializer_class = TalentListSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
-    pagination_class = LargeResultsSetPagination
-    filter_backends = (OrderingFilter,)
+    pagination_class = KeysetPagination
+    filter_backends = (SearchRankOrderingFilter,)
+    # 모두 (컬럼, id) 인덱스가 있는 talent 컬럼 (Talent.Meta.index_together)
+    ordering_fields = (
+        'pk',
+        'rating_score',
+        'review_count',
+        'wishlist_count',
+        'registration_count',
+        'price_per_hour',
+        'created_date',
+    )
     ordering = ('-pk',)
+    # 비로그인 사용자 목록 응답 캐시 (TALENT_CATALOG 버전이 바뀌면 무효화)
+    response_cache_prefix = 'talent_list'
+    response_cache_timeout = 60 * 10
 
     # rest_framework의 SearchFilter 사용시
     # filter_backends = (filters.SearchFilter,)
@@ -87,15 +115,59 @@ class TalentListCreateView(generics.ListCreateAPIView):
         ret.update(ret_pk)
         return Response(ret, status=status.HTTP_201_CREATED, headers=headers)
 
+    def perform_create(self, serializer):
+        # 수업 저장과 카운터 갱신(talent.signals)을 한 transaction으로
+        with transaction.atomic():
+            serializer.save()
+
+    def list(self, request, *args, **kwargs):
+        """
+        ?facets=category,region,type 을 주면 현재 필터(q, title, region, category) 기준으로
+        facet 값별 수업 수를 응답의 facets에 함께 돌려준다.
+
+        비로그인 요청은 정리된 쿼리 파라미터 + 카탈로그 버전 기준으로 응답 전체를 캐시한다.
+        """
+        is_anonymous = request.user.is_anonymous
+        if is_anonymous:
+            data = get_cached_response(self.response_cache_prefix, TALENT_CATALOG, request.query_params)
+            if data is not None:
+                return Response(data)
+
+        response = super(TalentListCreateView, self).list(request, *args, **kwargs)
+        facets = request.query_params.get('facets', None)
+        if facets:
+            filters = {key: request.query_params.get(key, None) for key in ('q', 'title', 'region', 'category')}
+            response.data['facets'] = talent_facets(
+                self.get_queryset(),
+                [name.strip() for name in facets.split(',')],
+                filters,
+            )
+        if is_anonymous:
+            set_cached_response(self.response_cache_prefix, TALENT_CATALOG, request.query_params,
+                                response.data, self.response_cache_timeout)
+        return response
+
     def get_queryset(self):
-        queryset = Talent.objects.all()
+        # ?fields= / ?omit= 로 빠진 필드의 join / annotate는 붙이지 않는다.
+        queryset = Talent.objects.with_list_info(rendered_fields(self.request, self.get_serializer_class()))
+        q = self.request.query_params.get('q', None)
         title = self.request.query_params.get('title', None)
         region = self.request.query_params.get('region', None)
         category = self.request.query_params.get('category', None)
+        if q:
+            # 제목, 수업/튜터 소개, 튜터 이름에 대한 n-gram 전문 검색. 관련도(rank) 순으로 정렬된다.
+            search_query = TalentSearchDocument.objects.build_query(q)
+            if search_query is None:
+                return queryset.none()
+            # cursor 페이지네이션의 기준 값으로 쓰이므로 float 대신 정확히 비교 가능한 decimal로 변환
+            queryset = queryset.filter(search_document__document=search_query).annotate(
+                rank=Cast(SearchRank(F('search_document__document'), search_query),
+                          DecimalField(max_digits=12, decimal_places=8)))
         if title is not None:
             queryset = queryset.filter(title__icontains=title)
         if region is not None:
-            queryset = queryset.filter(locations__region__icontains=region).distinct('pk')
+            # 지역 코드 정확히 일치 (region_codes GIN 인덱스 사용)
+            queryset = queryset.filter(region_codes__contains=[region.upper()])
         if category is not None:
             queryset = queryset.filter(category__icontains=category)
         queryset = queryset.filter(is_verified=True)
@@ -105,35 +177,188 @@ class TalentListCreateView(generics.ListCreateAPIView):
 # 인증 승인이 필요한 talent list api
 class UnverifiedTalentListView(generics.ListAPIView):
     permission_classes = (custom_permission.CustomerIsAdminAccessPermission,)
-    queryset = Talent.objects.filter(is_verified=False)
     serializer_class = TalentListSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = KeysetPagination
     filter_backends = (OrderingFilter,)
+    # cursor 페이지네이션 기준으로 쓸 수 있는 컬럼만 (?ordering=user 처럼 관련 객체로 정렬하지 않도록)
+    ordering_fields = ('pk', 'created_date')
     ordering = ('-pk',)
 
+    def get_queryset(self):
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        return Talent.objects.with_list_info(fields).filter(is_verified=False)
+
+
+# 검색어 자동완성 api
+class TalentSuggestView(APIView):
+    """
+    ?prefix= 로 시작하는 인증된 수업의 pk, title, category만 돌려준다.
+    자주 입력되는 prefix는 프로세스 내부 캐시에서 바로 응답한다.
+    """
+    default_limit = 10
+    max_limit = 20
+    suggest_cache = TTLCache(ttl=30, max_size=2000)
+
+    def get(self, request):
+        prefix = request.query_params.get('prefix', '').strip()
+        if not prefix:
+            return Response({'results': []})
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+
+        cache_key = (prefix.lower(), limit)
+        results = self.suggest_cache.get(cache_key)
+        if results is None:
+            category_display = dict(Talent.CATEGORY)
+            talents = Talent.objects.filter(is_verified=True, title__istartswith=prefix).annotate(
+                similarity=TrigramSimilarity('title', prefix)
+            ).order_by('-similarity', '-pk').values('pk', 'title', 'category')[:limit]
+            results = [
+                {
+                    'pk': talent['pk'],
+                    'title': talent['title'],
+                    'category': category_display.get(talent['category'], talent['category']),
+                }
+                for talent in talents
+            ]
+            self.suggest_cache.set(cache_key, results)
+        return Response({'results': results})
+
+
+# 인기 급상승 수업 api
+class TrendingTalentListView(generics.ListAPIView):
+    """
+    compute_trending 명령으로 미리 계산해 둔 순위(TrendingTalent)대로 수업을 돌려준다.
+    ?limit= (기본 20, 1 ~ 100)
+    """
+    serializer_class = TalentShortInfoSerializer
+    # ?limit= 을 직접 처리하므로 기본 LimitOffsetPagination은 쓰지 않는다.
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = max(1, min(int(self.request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+        fields = rendered_fields(self.request, self.get_serializer_class())
+        return Talent.objects.with_list_info(fields).filter(
+            trending__isnull=False,
+            is_verified=True,
+        ).order_by('trending__rank')[:limit]
+
 
 class TalentShortDetailView(generics.RetrieveAPIView):
     queryset = Talent.objects.all()
     serializer_class = TalentShortDetailSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        # 버전이 같으면 serializer를 실행하지 않고 304를 돌려준다.
+        version = Talent.objects.content_version_of(kwargs['pk'])
+        if version is None:
+            return super(TalentShortDetailView, self).retrieve(request, *args, **kwargs)
+        etag = make_etag('short', kwargs['pk'], version, sparse_fieldset_key(request))
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        response = super(TalentShortDetailView, self).retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+
+# 여러 talent의 요약 정보를 한 번에 조회하는 api
+class TalentBatchView(APIView):
+    """
+    ?ids=1,2,3 (최대 100개) 의 요약 정보(detail-short와 같은 형식)를 id를 key로 돌려준다.
+    찾을 수 없는 id는 missing에 담긴다. ?fields= / ?omit= 도 사용할 수 있다.
+    """
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            ids = [int(item) for item in request.query_params.get('ids', '').split(',') if item.strip()]
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": "ids에는 숫자만 입력해주세요."})
+        ids = list(collections.OrderedDict.fromkeys(ids))
+        if not ids:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"detail": "ids를 입력해주세요."})
+        if len(ids) > self.max_ids:
+            return Response(status=status.HTTP_400_BAD_REQUEST,
+                            data={"detail": "ids는 최대 {}개까지 입력할 수 있습니다.".format(self.max_ids)})
+
+        # 모든 talent가 같은 join을 쓰므로 개수와 관계없이 쿼리 한 번
+        fields = rendered_fields(request, TalentShortDetailSerializer)
+        talents = {talent.pk: talent for talent in Talent.objects.with_list_info(fields).filter(pk__in=ids)}
+        found = [pk for pk in ids if pk in talents]
+        serializer = TalentShortDetailSerializer([talents[pk] for pk in found], many=True, context={'request': request})
+        return Response({
+            'results': collections.OrderedDict(zip([str(pk) for pk in found], serializer.data)),
+            'missing': [pk for pk in ids if pk not in talents],
+        })
+
 
 # 하나의 talent에 대한 세부 정보 api (request user 정보 포함)
 class TalentDetailView(APIView):
+    """
+    talent 공통 정보는 (pk, content_version) 별로 캐시하고,
+    요청한 유저 정보(user, is_wished, is_registered)만 매 요청마다 계산해서 합친다.
+    """
+    detail_cache_timeout = 60 * 10
+
     def get(self, request, *args, **kwargs):
         try:
-            talent = Talent.objects.get(pk=kwargs['pk'])
-            talent_dict = TalentDetailSerializer(talent).data
-            user = request.user
-            try:
-                user_dict = UserSerializer(user).data
-                talent_dict["user"] = user_dict
-            except:
-                talent_dict["user"] = "Login Required"
+            version = Talent.objects.content_version_of(kwargs['pk'])
+            if version is None:
+                raise Talent.DoesNotExist
+            # 응답에 요청한 유저 정보(위시리스트 여부, 활동 카운터 등)가 포함되므로 그 내용의 hash도 ETag에 넣는다.
+            # 위시리스트를 토글하면 content_version은 그대로여도 ETag가 바뀐다.
+            overlay = self.get_user_overlay(request, kwargs['pk'])
+            overlay_hash = hashlib.md5(
+                json.dumps(overlay, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+            etag = make_etag('all', kwargs['pk'], version, request.user.pk or 'anonymous',
+                             overlay_hash, sparse_fieldset_key(request))
+            if etag_matches(request, etag):
+                return not_modified_response(etag)
 
-            return Response(talent_dict)
+            talent_dict = self.get_shared_payload(request, kwargs['pk'], version)
+            talent_dict.update(overlay)
+
+            response = Response(talent_dict)
+            response['ETag'] = etag
+            return response
         except Talent.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND, data={"detail": "찾을 수 없습니다."})
 
+    def get_shared_payload(self, request, pk, version):
+        """
+        모든 유저에게 같은 TalentDetailSerializer 결과. 관련 모델이 바뀌면 content_version이 올라가 키가 바뀐다.
+        (next 링크가 절대 url이므로 host도 키에 포함)
+        """
+        cache_key = 'talent_detail:{}:{}:{}:{}'.format(pk, version, sparse_fieldset_key(request), request.get_host())
+        payload = cache.get(cache_key)
+        if payload is None:
+            talent = Talent.objects.select_related('tutor__user', 'rating_stats').get(pk=pk)
+            payload = TalentDetailSerializer(talent, context={'request': request}).data
+            cache.set(cache_key, payload, self.detail_cache_timeout)
+        return collections.OrderedDict(payload)
+
+    @staticmethod
+    def get_user_overlay(request, pk):
+        user = request.user
+        if not user.is_authenticated:
+            return collections.OrderedDict((
+                ("user", "Login Required"),
+                ("is_wished", False),
+                ("is_registered", False),
+            ))
+        return collections.OrderedDict((
+            ("user", UserSerializer(user).data),
+            ("is_wished", WishList.objects.filter(talent_id=pk, user=user).exists()),
+            ("is_registered", Registration.objects.filter(talent_location__talent_id=pk, student=user).exists()),
+        ))
+
 
 # talent의 is_soldout 상태 toggle
 class TalentSalesStatusToggleView(APIView):
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ClassConfig(AppConfig):
     name = 'talent'
+
+    def ready(self):
+        from . import signals
+        from .db_indexes import create_postgres_indexes
+        post_migrate.connect(create_postgres_indexes, sender=self)
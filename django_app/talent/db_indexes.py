@@ -0,0 +1,26 @@
+from django.db import connections
+
+from talent.models import Talent, TalentSearchDocument
+
+# Django ORM(1.10)으로 만들 수 없는 PostgreSQL 전용 인덱스
+# migrate 후(post_migrate)에 존재하지 않으면 생성한다.
+POSTGRES_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS talent_search_document_gin '
+    'ON {} USING gin (document)'.format(TalentSearchDocument._meta.db_table),
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # title__istartswith / title__icontains 는 UPPER("title"::text) LIKE ... 로 변환되므로 같은 식으로 인덱스를 만든다.
+    'CREATE INDEX IF NOT EXISTS talent_title_upper_trgm '
+    'ON {} USING gin (UPPER(title::text) gin_trgm_ops)'.format(Talent._meta.db_table),
+    # region_codes__contains=[...] (@>) 필터용
+    'CREATE INDEX IF NOT EXISTS talent_region_codes_gin '
+    'ON {} USING gin (region_codes)'.format(Talent._meta.db_table),
+)
+
+
+def create_postgres_indexes(sender, using='default', **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in POSTGRES_INDEXES:
+            cursor.execute(sql)
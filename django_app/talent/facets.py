@@ -0,0 +1,69 @@
+import collections
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from talent.models import Talent, Location
+from utils.cache_version import TALENT_CATALOG, get_cache_version
+
+__all__ = (
+    'FACET_NAMES',
+    'talent_facets',
+)
+
+FACET_NAMES = ('category', 'region', 'type')
+FACET_CACHE_TIMEOUT = 60 * 5
+
+
+def _facet_rows(rows, key, display):
+    return [
+        collections.OrderedDict((
+            ('value', row[key]),
+            ('name', display.get(row[key], row[key])),
+            ('count', row['count']),
+        ))
+        for row in rows
+    ]
+
+
+def _compute_facets(queryset, names):
+    talent_ids = queryset.order_by().values('pk')
+    facets = collections.OrderedDict()
+    for name in names:
+        if name == 'category':
+            rows = Talent.objects.filter(pk__in=talent_ids).order_by().values('category').annotate(
+                count=Count('pk')).order_by('-count', 'category')
+            facets[name] = _facet_rows(rows, 'category', dict(Talent.CATEGORY))
+        elif name == 'type':
+            rows = Talent.objects.filter(pk__in=talent_ids).order_by().values('type').annotate(
+                count=Count('pk')).order_by('-count', 'type')
+            facets[name] = _facet_rows(rows, 'type', dict(Talent.TYPE_CHOICE))
+        elif name == 'region':
+            rows = Location.objects.filter(talent__in=talent_ids).order_by().values('region').annotate(
+                count=Count('talent', distinct=True)).order_by('-count', 'region')
+            facets[name] = _facet_rows(rows, 'region', dict(Location.REGION))
+    return facets
+
+
+def talent_facets(queryset, names, filters):
+    """
+    필터가 적용된 talent queryset에 대해 facet 값별 talent 수를 구한다.
+    facet 하나당 GROUP BY 쿼리 한 번이며, 필터 조합별로 캐시된다.
+    (talent / location이 바뀌면 TALENT_CATALOG 버전이 올라가 캐시가 무효화됨)
+
+    :param names: FACET_NAMES 중 요청된 facet 이름
+    :param filters: 캐시 키를 만들기 위한 현재 필터 dict
+    """
+    names = [name for name in FACET_NAMES if name in names]
+    normalized = '&'.join('{}={}'.format(key, filters[key]) for key in sorted(filters) if filters[key] is not None)
+    cache_key = 'talent_facets:{}:{}:{}'.format(
+        get_cache_version(TALENT_CATALOG),
+        ','.join(names),
+        hashlib.md5(normalized.encode('utf-8')).hexdigest(),
+    )
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = _compute_facets(queryset, names)
+        cache.set(cache_key, facets, FACET_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,84 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from talent.models import Talent, TrendingTalent, WishList, Registration, Review, Location
+
+
+class Command(BaseCommand):
+    help = '최근 위시리스트 / 수강신청 / 리뷰 활동에 지수 감쇠를 적용해 TrendingTalent 순위를 다시 만든다.'
+
+    # 활동 하나당 가중치
+    WISHLIST_WEIGHT = 1.0
+    REGISTRATION_WEIGHT = 3.0
+    REVIEW_WEIGHT = 2.0
+
+    def add_arguments(self, parser):
+        parser.add_argument('--half-life-days', type=float, default=7,
+                            help='활동 점수가 절반이 되는 기간(일)')
+        parser.add_argument('--window-days', type=int, default=30,
+                            help='이 기간(일) 이전의 활동은 계산하지 않는다.')
+        parser.add_argument('--limit', type=int, default=200,
+                            help='저장할 순위 개수')
+
+    def activity_queries(self):
+        """
+        (가중치, SQL) 목록. SQL은 talent_id별 감쇠 점수 합을 돌려준다.
+        파라미터: 감쇠 계수, 기준 시각, 기준 시각, 시작 시각
+        """
+        decayed = 'SUM(EXP(-%s * EXTRACT(EPOCH FROM (%s - {date}))))'
+        tables = {
+            'wishlist': WishList._meta.db_table,
+            'registration': Registration._meta.db_table,
+            'review': Review._meta.db_table,
+            'location': Location._meta.db_table,
+        }
+        return (
+            (self.WISHLIST_WEIGHT,
+             ('SELECT {wishlist}.talent_id, ' + decayed.format(date='{wishlist}.added_date') +
+              ' FROM {wishlist} WHERE {wishlist}.added_date <= %s AND {wishlist}.added_date >= %s'
+              ' GROUP BY {wishlist}.talent_id').format(**tables)),
+            (self.REGISTRATION_WEIGHT,
+             ('SELECT {location}.talent_id, ' + decayed.format(date='{registration}.joined_date') +
+              ' FROM {registration} INNER JOIN {location} ON {registration}.talent_location_id = {location}.id'
+              ' WHERE {registration}.joined_date <= %s AND {registration}.joined_date >= %s'
+              ' GROUP BY {location}.talent_id').format(**tables)),
+            (self.REVIEW_WEIGHT,
+             ('SELECT {review}.talent_id, ' + decayed.format(date='{review}.created_date') +
+              ' FROM {review} WHERE {review}.created_date <= %s AND {review}.created_date >= %s'
+              ' GROUP BY {review}.talent_id').format(**tables)),
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(days=options['window_days'])
+        decay = math.log(2) / (options['half_life_days'] * 24 * 60 * 60)
+
+        # 활동 종류마다 GROUP BY 쿼리 한 번. 감쇠 계산은 DB에서 한꺼번에 처리한다.
+        scores = defaultdict(float)
+        with connection.cursor() as cursor:
+            for weight, sql in self.activity_queries():
+                cursor.execute(sql, [decay, now, now, since])
+                for talent_id, score in cursor.fetchall():
+                    scores[talent_id] += weight * score
+
+        verified = set(Talent.objects.filter(pk__in=list(scores), is_verified=True).values_list('pk', flat=True))
+        ranking = sorted(
+            ((score, talent_id) for talent_id, score in scores.items() if talent_id in verified),
+            key=lambda item: (-item[0], -item[1]),
+        )[:options['limit']]
+        trending = [
+            TrendingTalent(talent_id=talent_id, rank=rank, score=score, computed_date=now)
+            for rank, (score, talent_id) in enumerate(ranking, start=1)
+        ]
+
+        # 읽는 쪽은 commit 전까지 이전 순위를 그대로 본다.
+        with transaction.atomic():
+            TrendingTalent.objects.all().delete()
+            TrendingTalent.objects.bulk_create(trending)
+
+        self.stdout.write('인기 급상승 수업 {}개를 저장했습니다.'.format(len(trending)))
@@ -0,0 +1,180 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from psycopg2.extras import execute_values
+
+from talent.models import Talent, Review, Question
+from utils.cache_version import TALENT_CATALOG, bump_cache_version
+
+# 입력 row에서 읽는 내용 항목과 기본값 (talent, user, created_date, id는 공통)
+CONTENT_FIELDS = {
+    'review': [(field, 1) for field in Review.RATING_FIELDS] + [('comment', '')],
+    'question': [('content', None)],
+}
+MODELS = {
+    'review': Review,
+    'question': Question,
+}
+# 잘못된 row는 이 개수까지만 출력
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = '제휴 기관의 과거 리뷰 / 질문을 JSONL 또는 CSV 파일에서 chunk 단위로 일괄 등록한다. ' \
+           '이미 있는 리뷰(같은 수업, 같은 사용자)와 이미 등록한 row(같은 import_key)는 DB 제약으로 건너뛴다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(MODELS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='지정하지 않으면 파일 확장자로 판단한다.')
+        parser.add_argument('--source',
+                            help='원본 id 앞에 붙일 이름. 지정하면 import_key="<source>:<id>"로 저장해서 '
+                                 '같은 파일을 다시 실행해도 중복 저장되지 않는다.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in ('jsonl', 'csv'):
+            raise CommandError('파일 형식을 알 수 없습니다. --format jsonl|csv 를 지정하세요.')
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size는 1 이상이어야 합니다.')
+
+        model = MODELS[kind]
+        content_fields = CONTENT_FIELDS[kind]
+        columns = ['talent_id', 'user_id', 'created_date', 'import_key'] + [field for field, _ in content_fields]
+
+        # row마다 존재 여부를 조회하지 않도록 id를 미리 한 번에 읽어둔다.
+        self.talent_ids = set(Talent.objects.values_list('pk', flat=True))
+        self.user_ids = set(get_user_model().objects.values_list('pk', flat=True))
+        self.source = options['source']
+        self.content_fields = content_fields
+
+        read = inserted = invalid = 0
+        started = time.time()
+        rows = self._read_rows(path, fmt)
+        for number in itertools.count(1):
+            chunk = list(itertools.islice(rows, options['chunk_size']))
+            if not chunk:
+                break
+            values = []
+            for line, row in chunk:
+                try:
+                    values.append(self._clean(row))
+                except ValueError as e:
+                    if invalid < MAX_REPORTED_ERRORS:
+                        self.stderr.write('{}번째 줄: {}'.format(line, e))
+                    invalid += 1
+            read += len(chunk)
+            if values:
+                inserted += self._insert(model, columns, values)
+
+            elapsed = time.time() - started
+            self.stdout.write('chunk {} : 읽음 {}, 등록 {}, 잘못된 row {} ({:.0f} row/s)'.format(
+                number, read, inserted, invalid, read / elapsed if elapsed else 0))
+
+        elapsed = time.time() - started
+        self.stdout.write('{} {}개 중 {}개 등록, 중복 {}개, 잘못된 row {}개 ({:.1f}초, {:.0f} row/s)'.format(
+            kind, read, inserted, read - inserted - invalid, invalid, elapsed, read / elapsed if elapsed else 0))
+
+        if inserted:
+            # signal을 거치지 않았으므로 파생 데이터와 목록 캐시는 마지막에 한 번만 갱신한다.
+            if kind == 'review':
+                call_command('reconcile_rating_stats', stdout=self.stdout)
+                call_command('reconcile_user_counters', stdout=self.stdout)
+            bump_cache_version(TALENT_CATALOG)
+
+    @staticmethod
+    def _read_rows(path, fmt):
+        """
+        파일 전체를 읽지 않고 (줄 번호, row dict)를 하나씩 돌려준다. JSON이 깨진 줄은 row가 None
+        """
+        with open(path, encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                for line, row in enumerate(csv.DictReader(f), start=2):
+                    yield line, row
+                return
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, None
+
+    def _clean(self, row):
+        """
+        :return: INSERT할 값 tuple (columns 순서)
+        :raise ValueError: 잘못된 row
+        """
+        if not isinstance(row, dict):
+            raise ValueError('JSON 객체가 아닙니다.')
+        talent_id = self._to_int(row.get('talent'), 'talent')
+        if talent_id not in self.talent_ids:
+            raise ValueError('talent {}이(가) 없습니다.'.format(talent_id))
+        user_id = self._to_int(row.get('user'), 'user')
+        if user_id not in self.user_ids:
+            raise ValueError('user {}이(가) 없습니다.'.format(user_id))
+
+        created_date = timezone.now()
+        if row.get('created_date'):
+            created_date = parse_datetime(str(row['created_date']))
+            if created_date is None:
+                raise ValueError('created_date 형식이 잘못되었습니다.')
+            if timezone.is_naive(created_date):
+                created_date = timezone.make_aware(created_date)
+
+        import_key = None
+        if self.source and row.get('id') not in (None, ''):
+            import_key = '{}:{}'.format(self.source, row['id'])
+
+        values = [talent_id, user_id, created_date, import_key]
+        for field, default in self.content_fields:
+            value = row.get(field)
+            if value in (None, ''):
+                if default is None:
+                    raise ValueError('{}이(가) 비어 있습니다.'.format(field))
+                value = default
+            if field in Review.RATING_FIELDS:
+                value = self._to_int(value, field)
+                if not 1 <= value <= 5:
+                    raise ValueError('{}은(는) 1 ~ 5 사이여야 합니다.'.format(field))
+            values.append(value)
+        return tuple(values)
+
+    @staticmethod
+    def _to_int(value, field):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError('{} 값이 숫자가 아닙니다: {!r}'.format(field, value))
+
+    @staticmethod
+    def _insert(model, columns, values):
+        """
+        chunk 하나를 transaction 하나, INSERT 한 번으로 저장한다.
+        unique 제약에 걸리는 row(중복)는 ON CONFLICT DO NOTHING으로 건너뛴다.
+        :return: 실제로 저장된 row 수
+        """
+        sql = 'INSERT INTO {table} ({columns}) VALUES %s ON CONFLICT DO NOTHING'.format(
+            table=connection.ops.quote_name(model._meta.db_table),
+            columns=', '.join(connection.ops.quote_name(column) for column in columns),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            talent_ids = {value[0] for value in values}
+            # execute_values는 psycopg2 cursor가 필요하다. page_size를 chunk 크기로 두어 rowcount가 chunk 전체 기준이 되도록 한다.
+            execute_values(cursor.cursor, sql, values, page_size=len(values))
+            count = cursor.cursor.rowcount
+            # 상세 정보(ETag)가 바뀐 수업 표시
+            Talent.objects.filter(pk__in=talent_ids).bump_content_version()
+        return count
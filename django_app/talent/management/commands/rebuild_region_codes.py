@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from talent.models import Talent
+
+
+class Command(BaseCommand):
+    help = '모든 talent의 region_codes, has_school_location을 location 기준으로 다시 계산한다.'
+
+    def handle(self, *args, **options):
+        count = Talent.objects.all().refresh_region_codes()
+        self.stdout.write('talent {}개의 지역 정보를 갱신했습니다.'.format(count))
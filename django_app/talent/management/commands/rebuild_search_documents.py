@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from talent.models import Talent, TalentSearchDocument
+
+
+class Command(BaseCommand):
+    help = '모든 talent의 검색 문서(n-gram tsvector)를 다시 만든다.'
+
+    def handle(self, *args, **options):
+        count = 0
+        for talent in Talent.objects.select_related('tutor__user').iterator():
+            TalentSearchDocument.objects.refresh(talent)
+            count += 1
+        self.stdout.write('검색 문서 {}개를 갱신했습니다.'.format(count))
@@ -0,0 +1,45 @@
+from django.core.management import BaseCommand, call_command
+from django.db import connection, transaction
+from django.db.models import Case, Count, IntegerField, Sum, When
+
+from talent.models import Review, TalentRatingStats
+from talent.models.rating_stats import RATING_SCALE
+
+
+class Command(BaseCommand):
+    help = 'Review 테이블 전체를 talent별로 한 번에 집계해서 TalentRatingStats(합계, 점수 분포)를 다시 만든다.'
+
+    @staticmethod
+    def _bucket_name(field, score):
+        return '{}_{}'.format(field, score)
+
+    def handle(self, *args, **options):
+        aggregates = {'review_count': Count('pk')}
+        for field in Review.RATING_FIELDS:
+            aggregates['{}_sum'.format(field)] = Sum(field)
+            # 점수 분포도 같은 GROUP BY 쿼리 안에서 조건부 합계로 센다. (항목 5개 x 점수 5칸)
+            for score in range(1, RATING_SCALE + 1):
+                aggregates[self._bucket_name(field, score)] = Sum(
+                    Case(When(**{field: score, 'then': 1}), default=0, output_field=IntegerField())
+                )
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # 집계하는 동안 리뷰 작성/수정으로 인한 F() 갱신이 끼어들지 않도록 막는다.
+                with connection.cursor() as cursor:
+                    cursor.execute('LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE'.format(
+                        TalentRatingStats._meta.db_table))
+            rows = Review.objects.order_by().values('talent').annotate(**aggregates)
+            stats_list = []
+            for row in rows:
+                for field in Review.RATING_FIELDS:
+                    row['{}_histogram'.format(field)] = [
+                        row.pop(self._bucket_name(field, score)) for score in range(1, RATING_SCALE + 1)
+                    ]
+                stats_list.append(TalentRatingStats(talent_id=row.pop('talent'), **row))
+            TalentRatingStats.objects.all().delete()
+            TalentRatingStats.objects.bulk_create(stats_list, batch_size=1000)
+
+        self.stdout.write('TalentRatingStats {}개를 다시 계산했습니다.'.format(len(stats_list)))
+        # talent의 review_count, rating_score 컬럼도 새 집계에 맞춘다.
+        call_command('reconcile_talent_counters', stdout=self.stdout)
@@ -0,0 +1,49 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from talent.models import Talent, TalentRatingStats, Review, WishList, Registration, Location
+
+
+class Command(BaseCommand):
+    help = 'talent의 정렬용 카운터(rating_score, review_count, wishlist_count, registration_count)와 ' \
+           'location의 seats_taken을 원본 테이블에서 다시 계산한다.'
+
+    def handle(self, *args, **options):
+        tables = {
+            'talent': Talent._meta.db_table,
+            'stats': TalentRatingStats._meta.db_table,
+            'wishlist': WishList._meta.db_table,
+            'registration': Registration._meta.db_table,
+            'location': Location._meta.db_table,
+        }
+        rating_total = '({}) / {}.0'.format(
+            ' + '.join('{{stats}}.{}_sum'.format(field) for field in Review.RATING_FIELDS),
+            len(Review.RATING_FIELDS),
+        ).format(**tables)
+        # TalentRatingStats.bayesian_score와 같은 식
+        sql = (
+            'UPDATE {talent} SET '
+            'review_count = COALESCE({stats}.review_count, 0), '
+            'rating_score = (%s * %s + COALESCE(' + rating_total + ', 0)) '
+            '/ (%s + COALESCE({stats}.review_count, 0)), '
+            'wishlist_count = (SELECT COUNT(*) FROM {wishlist} WHERE {wishlist}.talent_id = {talent}.id), '
+            'registration_count = (SELECT COUNT(*) FROM {registration} '
+            'INNER JOIN {location} ON {registration}.talent_location_id = {location}.id '
+            'WHERE {location}.talent_id = {talent}.id) '
+            'FROM {talent} AS target LEFT OUTER JOIN {stats} ON {stats}.talent_id = target.id '
+            'WHERE target.id = {talent}.id'
+        ).format(**tables)
+        params = [Talent.RATING_PRIOR_MEAN, Talent.RATING_PRIOR_WEIGHT, Talent.RATING_PRIOR_WEIGHT]
+
+        # 장소별로 찬 자리 수 (정원 확인용)
+        seats_sql = (
+            'UPDATE {location} SET seats_taken = (SELECT COUNT(*) FROM {registration} '
+            'WHERE {registration}.talent_location_id = {location}.id)'
+        ).format(**tables)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            count = cursor.rowcount
+            cursor.execute(seats_sql)
+            location_count = cursor.rowcount
+        self.stdout.write('talent {}개의 카운터, 장소 {}개의 자리 수를 다시 계산했습니다.'.format(count, location_count))
@@ -5,4 +5,8 @@ from .class_image import *
 from .wish_list import *
 from .registration import *
 from .review import *
-from .qna import *
\ No newline at end of file
+from .qna import *
+from .rating_stats import *
+from .search_document import *
+from .trending import *
+from .idempotency import *
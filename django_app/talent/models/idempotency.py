@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+
+__all__ = (
+    'IdempotencyKey',
+)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key 헤더와 함께 들어온 생성 요청의 응답.
+    네트워크 문제로 같은 요청을 다시 보내면 새로 저장하지 않고 저장된 응답을 그대로 돌려준다.
+    생성된 row와 같은 transaction에서 저장된다.
+    """
+    MAX_LENGTH = 255
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='idempotency_keys')
+    key = models.CharField(max_length=MAX_LENGTH)
+    status_code = models.IntegerField()
+    response = JSONField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return 'User : {} Key : {}'.format(self.user_id, self.key)
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import F
 
 from .talent import Talent
 
@@ -8,6 +9,20 @@ __all__ = (
 )
 
 
+class LocationQuerySet(models.QuerySet):
+    def reserve_seat(self, pk, capacity):
+        """
+        빈 자리가 있을 때만 seats_taken을 1 늘리는 조건부 UPDATE 한 번. 정원을 넘지 않는다.
+        row lock은 transaction이 끝날 때까지 유지되므로 호출한 transaction은 짧게 끝내야 한다.
+        :param capacity: 장소당 정원 (Talent.max_number_student)
+        :return: 자리를 잡았으면 True
+        """
+        return bool(self.filter(pk=pk, seats_taken__lt=capacity).update(seats_taken=F('seats_taken') + 1))
+
+    def release_seat(self, pk):
+        return self.filter(pk=pk, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+
+
 class Location(models.Model):
     SCHOOL = (
         ('KOU', '고려대'),
@@ -65,6 +80,10 @@ class Location(models.Model):
         ('N', '아니오, 없습니다'),
     )
     REGION = AREA + SCHOOL
+    REGION_DISPLAY = dict(REGION)
+    SPECIFIC_LOCATION_DISPLAY = dict(SPECIFIC_LOCATION)
+    DAY_DISPLAY = dict(DAYS_OF_WEEK)
+    SCHOOL_CODES = frozenset(code for code, name in SCHOOL)
     talent = models.ForeignKey(Talent, limit_choices_to={'is_soldout': False}, related_name='locations')
     registered_student = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
@@ -78,6 +97,10 @@ class Location(models.Model):
     day = models.CharField(choices=DAYS_OF_WEEK, max_length=2)
     time = models.CharField(max_length=50, help_text=',로 나누어 입력해 주세요. 예시) 13-14시, 18-19시')
     location_message = models.TextField(blank=True)
+    # 수강신청으로 찬 자리 수. 정원은 talent.max_number_student (RegistrationListCreateView에서 예약)
+    seats_taken = models.IntegerField(default=0, editable=False)
+
+    objects = LocationQuerySet.as_manager()
 
     def __str__(self):
         return '{} - 지역: {}'.format(self.talent, self.get_region_display())
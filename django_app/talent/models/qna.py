@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Prefetch
 
 from member.models import Tutor
 from talent.models import Talent
@@ -10,11 +11,26 @@ __all__ = (
 )
 
 
+class QuestionQuerySet(models.QuerySet):
+    def with_replies(self):
+        """
+        질문 작성자는 join, 답변(+튜터 정보)은 최신순으로 prefetch 한다.
+        질문 수와 관계없이 쿼리 2번
+        """
+        return self.select_related('user').prefetch_related(
+            Prefetch('reply_set', queryset=Reply.objects.select_related('tutor__user').order_by('-pk'))
+        )
+
+
 class Question(models.Model):
     talent = models.ForeignKey(Talent)
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
     content = models.TextField()
     created_date = models.DateTimeField(auto_now_add=True)
+    # 외부 데이터 일괄 등록(import_reviews_qna) 시 '<source>:<원본 id>'. 다시 실행해도 중복 저장되지 않도록 unique
+    import_key = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+
+    objects = QuestionQuerySet.as_manager()
 
     def __str__(self):
         return 'Talent : {} User : {}'.format(self.talent.title, self.user.name)
@@ -0,0 +1,162 @@
+import collections
+
+from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, models
+from django.db.models import F
+
+from talent.models import Talent, Review
+
+__all__ = (
+    'TalentRatingStats',
+)
+
+# 리뷰 점수 범위 (Review의 각 항목은 1 ~ 5점)
+RATING_SCALE = 5
+
+
+def empty_histogram():
+    return [0] * RATING_SCALE
+
+
+class TalentRatingStatsManager(models.Manager):
+    def _apply(self, talent_id, review_count, deltas, histogram_deltas):
+        """
+        리뷰 생성/수정/삭제로 생긴 차이만큼 F() 로 누적값을 갱신한다.
+        리뷰 저장과 같은 transaction 안에서 실행되어야 한다. (talent.signals의 Review 저장 / 삭제 signal)
+        """
+        values = {
+            '{}_sum'.format(field): F('{}_sum'.format(field)) + delta
+            for field, delta in deltas.items()
+        }
+        values['review_count'] = F('review_count') + review_count
+        if not self.filter(talent_id=talent_id).update(**values):
+            if review_count <= 0:
+                # 수업과 함께 삭제되는 중(row가 먼저 삭제됨)이면 새로 만들지 않는다.
+                return
+            self.get_or_create(talent_id=talent_id)
+            self.filter(talent_id=talent_id).update(**values)
+        self._apply_histogram(talent_id, histogram_deltas)
+
+        # 위 UPDATE로 row lock을 잡고 있으므로 다시 읽은 값이 이 transaction의 최신 값이다.
+        stats = self.get(talent_id=talent_id)
+        Talent.objects.filter(pk=talent_id).update(
+            review_count=stats.review_count,
+            rating_score=stats.bayesian_score,
+        )
+
+    def _apply_histogram(self, talent_id, histogram_deltas):
+        """
+        항목별 점수 분포 배열의 각 칸에 차이를 더한다. (UPDATE 한 번, 바뀐 항목만)
+        ORM으로는 배열 원소를 F() 갱신할 수 없어서 raw SQL로 실행한다.
+        """
+        assignments = []
+        params = []
+        for field in Review.RATING_FIELDS:
+            deltas = histogram_deltas[field]
+            if not any(deltas):
+                continue
+            column = connection.ops.quote_name('{}_histogram'.format(field))
+            # postgresql 배열은 1부터 시작하므로 n점의 개수는 column[n]
+            assignments.append('{column} = ARRAY[{items}]'.format(
+                column=column,
+                items=', '.join('{}[{}] + %s'.format(column, score) for score in range(1, RATING_SCALE + 1)),
+            ))
+            params.extend(deltas)
+        if not assignments:
+            return
+        sql = 'UPDATE {table} SET {assignments} WHERE talent_id = %s'.format(
+            table=connection.ops.quote_name(self.model._meta.db_table),
+            assignments=', '.join(assignments),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [talent_id])
+
+    @staticmethod
+    def _histogram_deltas(added=None, removed=None):
+        """
+        :param added: 분포에 더할 rating_values
+        :param removed: 분포에서 뺄 rating_values
+        :return: {항목: [1점 차이, ..., 5점 차이]}
+        """
+        histogram_deltas = {field: empty_histogram() for field in Review.RATING_FIELDS}
+        for values, sign in ((added, 1), (removed, -1)):
+            for field, score in (values or {}).items():
+                histogram_deltas[field][score - 1] += sign
+        return histogram_deltas
+
+    def add_review(self, review):
+        values = review.rating_values
+        self._apply(review.talent_id, 1, values, self._histogram_deltas(added=values))
+
+    def remove_review(self, review):
+        values = review.rating_values
+        deltas = {field: -value for field, value in values.items()}
+        self._apply(review.talent_id, -1, deltas, self._histogram_deltas(removed=values))
+
+    def change_review(self, review, old_values):
+        """
+        :param old_values: 수정 전 review.rating_values
+        """
+        values = review.rating_values
+        deltas = {field: value - old_values[field] for field, value in values.items()}
+        self._apply(review.talent_id, 0, deltas, self._histogram_deltas(added=values, removed=old_values))
+
+
+class TalentRatingStats(models.Model):
+    """
+    talent별 리뷰 점수의 합계와 개수, 항목별 점수 분포.
+    평균 평점 / 별점 분포를 읽을 때 리뷰 전체를 읽지 않고 이 row 하나만 조회한다.
+    """
+    talent = models.OneToOneField(Talent, primary_key=True, related_name='rating_stats')
+    review_count = models.IntegerField(default=0)
+    curriculum_sum = models.IntegerField(default=0)
+    readiness_sum = models.IntegerField(default=0)
+    timeliness_sum = models.IntegerField(default=0)
+    delivery_sum = models.IntegerField(default=0)
+    friendliness_sum = models.IntegerField(default=0)
+    # 항목별 [1점 리뷰 수, 2점 리뷰 수, ..., 5점 리뷰 수]
+    curriculum_histogram = ArrayField(models.IntegerField(), size=RATING_SCALE, default=empty_histogram)
+    readiness_histogram = ArrayField(models.IntegerField(), size=RATING_SCALE, default=empty_histogram)
+    timeliness_histogram = ArrayField(models.IntegerField(), size=RATING_SCALE, default=empty_histogram)
+    delivery_histogram = ArrayField(models.IntegerField(), size=RATING_SCALE, default=empty_histogram)
+    friendliness_histogram = ArrayField(models.IntegerField(), size=RATING_SCALE, default=empty_histogram)
+
+    objects = TalentRatingStatsManager()
+
+    def __str__(self):
+        return 'Talent : {}, 리뷰 수 : {}'.format(self.talent_id, self.review_count)
+
+    @classmethod
+    def for_talent(cls, talent):
+        """
+        리뷰가 없어 row가 없는 talent는 0으로 채워진 (저장되지 않은) 객체를 돌려준다.
+        """
+        try:
+            return talent.rating_stats
+        except ObjectDoesNotExist:
+            return cls(talent_id=talent.pk)
+
+    def histogram(self, field):
+        """
+        :return: {점수: 리뷰 수} (1점부터 5점 순서)
+        """
+        counts = getattr(self, '{}_histogram'.format(field))
+        return collections.OrderedDict(zip(range(1, RATING_SCALE + 1), counts))
+
+    @property
+    def rating_total(self):
+        """
+        리뷰별 평균 점수(5개 항목 평균)의 합
+        """
+        total = sum(getattr(self, '{}_sum'.format(field)) for field in Review.RATING_FIELDS)
+        return total / len(Review.RATING_FIELDS)
+
+    @property
+    def bayesian_score(self):
+        """
+        리뷰 Talent.RATING_PRIOR_WEIGHT개 만큼의 Talent.RATING_PRIOR_MEAN 점 리뷰가 더 있다고 보고 낸 평균.
+        리뷰가 하나뿐인 5점 수업이 목록 맨 위로 올라가지 않도록 한다.
+        """
+        prior_total = Talent.RATING_PRIOR_MEAN * Talent.RATING_PRIOR_WEIGHT
+        return (prior_total + self.rating_total) / (Talent.RATING_PRIOR_WEIGHT + self.review_count)
@@ -26,6 +26,10 @@ class Registration(models.Model):
                                             help_text="해당 수업관련 경력을 개월로 입력")
     message_to_tutor = models.TextField(help_text="수강신청시 유저가 튜터에게 보내는 메세지", blank=False)
 
+    class Meta:
+        # 같은 장소에는 한 번만 신청 (중복 확인 COUNT 대신 이 제약으로 막는다)
+        unique_together = ('student', 'talent_location')
+
     def __str__(self):
         return '{} 님  {}: {} 수업을 신청하였습니다'.format(self.student.username, self.talent_location.talent.pk,
                                                  self.talent_location.talent.title)
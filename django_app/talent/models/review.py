@@ -6,6 +6,13 @@ from talent.models import Talent
 
 
 class Review(models.Model):
+    RATING_FIELDS = (
+        'curriculum',
+        'readiness',
+        'timeliness',
+        'delivery',
+        'friendliness',
+    )
     talent = models.ForeignKey(Talent, related_name='reviews', default=1)
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
     created_date = models.DateTimeField(auto_now_add=True)
@@ -20,6 +27,16 @@ class Review(models.Model):
     friendliness = models.IntegerField(default=1, validators=[MaxValueValidator(5), MinValueValidator(1)],
                                        help_text='5이하의 숫자를 입력하세요')
     comment = models.TextField(blank=True)
+    # 외부 데이터 일괄 등록(import_reviews_qna) 시 '<source>:<원본 id>'. 다시 실행해도 중복 저장되지 않도록 unique
+    import_key = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        # 한 수업에 한 사람당 리뷰 하나 (일괄 등록 시 중복은 이 제약으로 건너뜀)
+        unique_together = ('talent', 'user')
+
+    @property
+    def rating_values(self):
+        return {field: getattr(self, field) for field in self.RATING_FIELDS}
 
     @property
     def average_rate(self):
@@ -0,0 +1,72 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector, SearchVectorField
+from django.db import models
+from django.db.models import Value
+
+from talent.models import Talent
+
+__all__ = (
+    'TalentSearchDocument',
+)
+
+SEARCH_CONFIG = 'simple'
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def ngram_tokens(text, size=2):
+    """
+    한국어 합성어(예: '영어회화')가 부분 검색어('회화')로도 검색될 수 있도록
+    단어를 글자 단위 n-gram으로 나눈다. size 이하 길이의 단어는 그대로 사용한다.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        if len(word) <= size:
+            tokens.append(word)
+        else:
+            tokens.extend(word[index:index + size] for index in range(len(word) - size + 1))
+    return tokens
+
+
+def ngram_text(text, size=2):
+    return ' '.join(ngram_tokens(text, size))
+
+
+class TalentSearchDocumentManager(models.Manager):
+    @staticmethod
+    def build_document(talent):
+        """
+        제목(A) > 튜터 이름(B) > 수업/튜터 소개(C) 순으로 가중치를 준 n-gram tsvector
+        """
+        return (
+            SearchVector(Value(ngram_text(talent.title)), config=SEARCH_CONFIG, weight='A') +
+            SearchVector(Value(ngram_text(talent.tutor.user.name)), config=SEARCH_CONFIG, weight='B') +
+            SearchVector(Value(ngram_text('{} {}'.format(talent.class_info, talent.tutor_info))),
+                         config=SEARCH_CONFIG, weight='C')
+        )
+
+    def refresh(self, talent):
+        self.get_or_create(talent=talent)
+        self.filter(talent=talent).update(document=self.build_document(talent))
+
+    @staticmethod
+    def build_query(text):
+        """
+        검색어도 같은 방식으로 n-gram으로 나눠 모든 토큰을 포함하는 문서를 찾는다.
+        토큰이 없으면 None
+        """
+        search_query = None
+        for token in sorted(set(ngram_tokens(text))):
+            token_query = SearchQuery(token, config=SEARCH_CONFIG)
+            search_query = token_query if search_query is None else search_query & token_query
+        return search_query
+
+
+class TalentSearchDocument(models.Model):
+    talent = models.OneToOneField(Talent, primary_key=True, related_name='search_document')
+    document = SearchVectorField(null=True)
+
+    objects = TalentSearchDocumentManager()
+
+    def __str__(self):
+        return '{}'.format(self.talent_id)
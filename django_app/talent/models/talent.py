@@ -1,5 +1,7 @@
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import F
 
 from config import settings
 from member.models import Tutor
@@ -9,6 +11,73 @@ __all__ = (
 )
 
 
+class TalentQuerySet(models.QuerySet):
+    def with_list_info(self, fields=None):
+        """
+        리스트 시리얼라이저가 row마다 쿼리를 실행하지 않도록 tutor/user, 리뷰 집계(rating_stats)를 join 한다.
+        (지역, 리뷰/위시리스트/신청 수는 talent row의 컬럼을 사용)
+
+        :param fields: 출력할 serializer 필드 이름. 주어지면 필요한 join만 붙인다. (None이면 전부)
+        """
+        related = []
+        if fields is None or 'tutor' in fields:
+            related.append('tutor__user')
+        if fields is None or 'average_rate' in fields or 'average_rates' in fields:
+            related.append('rating_stats')
+        return self.select_related(*related) if related else self
+
+    def increment(self, field, amount=1):
+        """
+        카운터 컬럼을 UPDATE 한 번으로 증감한다. (save signal을 발생시키지 않음)
+        """
+        return self.update(**{field: F(field) + amount})
+
+    def bump_content_version(self):
+        """
+        상세 정보(ETag)가 바뀌었음을 표시한다. 저장 signal을 다시 발생시키지 않도록 UPDATE 한 번으로 처리
+        """
+        return self.increment('content_version')
+
+    def refresh_region_codes(self):
+        """
+        location 기준으로 region_codes, has_school_location을 다시 계산한다.
+        지역 조합이 같은 talent끼리 묶어서 조합당 UPDATE 한 번으로 처리
+        """
+        from talent.models import Location
+        regions = {pk: set() for pk in self.values_list('pk', flat=True)}
+        rows = Location.objects.filter(talent_id__in=list(regions)).values_list('talent_id', 'region').distinct()
+        for talent_id, region in rows:
+            regions[talent_id].add(region)
+
+        groups = {}
+        for talent_id, codes in regions.items():
+            groups.setdefault(frozenset(codes), []).append(talent_id)
+        for codes, talent_ids in groups.items():
+            self.model.objects.filter(pk__in=talent_ids).update(
+                region_codes=sorted(codes),
+                has_school_location=bool(codes & Location.SCHOOL_CODES),
+            )
+        return len(regions)
+
+    def mark_soldout_if_full(self):
+        """
+        장소가 있고 모든 장소의 자리(seats_taken)가 정원만큼 찬 수업을 is_soldout으로 바꾼다. UPDATE 한 번
+        (자리가 다시 나도 자동으로 되돌리지 않는다. 판매 재개는 튜터가 sales-status/toggle로)
+        """
+        from talent.models import Location
+        open_talents = Location.objects.filter(seats_taken__lt=F('talent__max_number_student')).values('talent_id')
+        return self.filter(
+            is_soldout=False,
+            pk__in=Location.objects.values('talent_id'),
+        ).exclude(pk__in=open_talents).update(is_soldout=True)
+
+    def content_version_of(self, pk):
+        """
+        serializer를 실행하지 않고 ETag를 만들기 위해 버전만 조회한다. 없는 talent면 None
+        """
+        return self.filter(pk=pk).values_list('content_version', flat=True).first()
+
+
 class Talent(models.Model):
     CATEGORY = (
         ('HNB', '헬스 / 뷰티'),
@@ -25,6 +94,9 @@ class Talent(models.Model):
         (1, '그룹 수업'),
         (2, '원데이 수업'),
     )
+    # rating_score(베이지안 평점)의 사전 평균 / 가중치(리뷰 수)
+    RATING_PRIOR_MEAN = 3.0
+    RATING_PRIOR_WEIGHT = 5
 
     tutor = models.ForeignKey(Tutor)
     wishlist_user = models.ManyToManyField(settings.AUTH_USER_MODEL, through='WishList')
@@ -46,23 +118,58 @@ class Talent(models.Model):
     max_number_student = models.IntegerField(default=1, validators=[MaxValueValidator(9), MinValueValidator(1)])
     tutor_message = models.TextField(blank=True)
     location_message = models.TextField(blank=True)
+    # talent 또는 관련 location, curriculum, class image, review, qna가 바뀔 때마다 1씩 증가 (상세 api ETag)
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    # location의 지역 코드 목록(정렬, 중복 제거)과 학교 지역 포함 여부. location 저장/삭제 시 갱신 (GIN 인덱스)
+    region_codes = ArrayField(models.CharField(max_length=4), default=list, blank=True, editable=False)
+    has_school_location = models.BooleanField(default=False, editable=False)
+    # 정렬(?ordering=)용 카운터. 리뷰 / 위시리스트 / 수강신청 저장, 삭제 시 갱신
+    # rating_score는 리뷰 수가 적을 때 사전 평균 쪽으로 당겨진 베이지안 평점 (TalentRatingStats.bayesian_score)
+    rating_score = models.FloatField(default=RATING_PRIOR_MEAN, editable=False)
+    review_count = models.IntegerField(default=0, editable=False)
+    wishlist_count = models.IntegerField(default=0, editable=False)
+    registration_count = models.IntegerField(default=0, editable=False)
+
+    # 다른 곳에서 UPDATE로만 갱신하는 필드. 인스턴스 저장 시 예전 값으로 덮어쓰지 않도록 제외한다.
+    DENORMALIZED_FIELDS = (
+        'content_version',
+        'region_codes',
+        'has_school_location',
+        'rating_score',
+        'review_count',
+        'wishlist_count',
+        'registration_count',
+    )
+
+    objects = TalentQuerySet.as_manager()
+
+    class Meta:
+        # 정렬 컬럼 + id 인덱스. cursor 페이지네이션이 인덱스 순서대로 읽는다.
+        index_together = (
+            ('rating_score', 'id'),
+            ('review_count', 'id'),
+            ('wishlist_count', 'id'),
+            ('registration_count', 'id'),
+            ('price_per_hour', 'id'),
+            ('created_date', 'id'),
+        )
 
     def __str__(self):
         return '{}'.format(self.title)
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super(Talent, self).save(*args, **kwargs)
+
     def get_category(self, obj):
         return obj.get_category_dispaly()
 
-    @property
-    def registration_count(self):
-        count = 0
-        for l in self.locations.all():
-            count += l.registrations.count()
-        return count
-
     @property
     def region_list(self):
-        region_list = []
-        for location in self.locations.all().distinct("region"):
-            region_list.append(location.get_region_display())
-        return region_list
+        # region_codes로 계산하므로 추가 쿼리가 없다.
+        from talent.models import Location
+        return [Location.REGION_DISPLAY.get(region, region) for region in self.region_codes]
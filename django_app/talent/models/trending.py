@@ -0,0 +1,24 @@
+from django.db import models
+
+from talent.models import Talent
+
+__all__ = (
+    'TrendingTalent',
+)
+
+
+class TrendingTalent(models.Model):
+    """
+    compute_trending 명령이 주기적으로 다시 채우는 인기 급상승 수업 순위.
+    최근 위시리스트 / 수강신청 / 리뷰 활동에 시간 감쇠를 적용한 점수 순서.
+    """
+    talent = models.OneToOneField(Talent, primary_key=True, related_name='trending')
+    rank = models.IntegerField(db_index=True)
+    score = models.FloatField()
+    computed_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('rank',)
+
+    def __str__(self):
+        return '{}위 - {} ({:.2f})'.format(self.rank, self.talent_id, self.score)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from talent.models import ClassImage, Talent
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 
 __all__ = (
     'ClassImageSerializer',
@@ -9,7 +10,7 @@ __all__ = (
 )
 
 
-class ClassImageSerializer(serializers.ModelSerializer):
+class ClassImageSerializer(DynamicFieldsModelSerializer):
     talent_pk = serializers.PrimaryKeyRelatedField(read_only=True, source='talent.id')
 
     class Meta:
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from talent.models import Curriculum, Talent
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 
 __all__ = (
     'CurriculumSerializer',
@@ -9,7 +10,7 @@ __all__ = (
 )
 
 
-class CurriculumSerializer(serializers.ModelSerializer):
+class CurriculumSerializer(DynamicFieldsModelSerializer):
     talent_pk = serializers.PrimaryKeyRelatedField(read_only=True, source='talent.id')
 
     class Meta:
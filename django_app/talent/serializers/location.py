@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from talent.models import Talent, Location
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 
 __all__ = (
     'LocationSerializer',
@@ -18,7 +19,7 @@ class LocationListSerializer(serializers.RelatedField):
         return '{}'.format(value.get_region_display())
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(DynamicFieldsModelSerializer):
     region = serializers.SerializerMethodField()
     specific_location = serializers.SerializerMethodField()
     day = serializers.SerializerMethodField()
@@ -40,17 +41,18 @@ class LocationSerializer(serializers.ModelSerializer):
             'time',
         )
 
+    # get_FOO_display()는 호출마다 choices로 dict를 새로 만들므로 미리 만들어 둔 dict를 사용
     @staticmethod
     def get_region(obj):
-        return obj.get_region_display()
+        return Location.REGION_DISPLAY.get(obj.region, obj.region)
 
     @staticmethod
     def get_specific_location(obj):
-        return obj.get_specific_location_display()
+        return Location.SPECIFIC_LOCATION_DISPLAY.get(obj.specific_location, obj.specific_location)
 
     @staticmethod
     def get_day(obj):
-        return obj.get_day_display()
+        return Location.DAY_DISPLAY.get(obj.day, obj.day)
 
     @staticmethod
     def get_time(obj):
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from member.models import Tutor
 from talent.models import Talent, Question, Reply
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 
 __all__ = (
     # 'QnaSerializer',
@@ -53,7 +54,7 @@ class ReplyUpdateSerializer(serializers.ModelSerializer):
         )
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(DynamicFieldsModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), source='user.name')
     user_image = serializers.ImageField(source='user.profile_image')
     replies = serializers.SerializerMethodField()
@@ -70,8 +71,15 @@ class QuestionSerializer(serializers.ModelSerializer):
         )
 
     def get_replies(self, obj):
-        ordered_queryset = obj.reply_set.order_by('-pk')
-        return ReplySerializer(ordered_queryset, many=True).data
+        """
+        Question.objects.with_replies()로 prefetch 된 답변(-pk 순서, tutor/user join)만 읽는다.
+        prefetch 되지 않은 질문 하나를 직렬화할 때만 직접 조회한다.
+        """
+        if 'reply_set' in getattr(obj, '_prefetched_objects_cache', {}):
+            replies = obj.reply_set.all()
+        else:
+            replies = obj.reply_set.select_related('tutor__user').order_by('-pk')
+        return ReplySerializer(replies, many=True).data
 
 
 class QuestionCreateSerializer(serializers.ModelSerializer):
@@ -6,6 +6,7 @@ from rest_framework import serializers
 from member.serializers import TutorSerializer
 from talent.models import Talent, Registration, Location
 from talent.serializers import TalentShortInfoSerializer
+from utils.dynamic_fields import DynamicFieldsModelSerializer
 from .location import LocationListSerializer
 
 __all__ = (
@@ -26,7 +27,7 @@ User = get_user_model()
 
 
 # user=================
-class MyRegistrationSerializer(serializers.ModelSerializer):
+class MyRegistrationSerializer(DynamicFieldsModelSerializer):
     registered_location = LocationListSerializer(read_only=True, source='talent_location')
     student_level = serializers.SerializerMethodField(read_only=True)
     talent = TalentShortInfoSerializer(source='talent_location.talent')
@@ -101,7 +102,7 @@ class MyEnrolledTalentWrapperSerializer(serializers.ModelSerializer):
 
 
 # tutor의 수업에 대한 수강신청서
-class MyApplicantsSerializer(serializers.ModelSerializer):
+class MyApplicantsSerializer(DynamicFieldsModelSerializer):
     registered_location = LocationListSerializer(read_only=True, source='talent_location')
     student_level = serializers.SerializerMethodField(read_only=True)
     talent = TalentShortInfoSerializer(source='talent_location.talent')
@@ -124,7 +125,7 @@ class MyApplicantsSerializer(serializers.ModelSerializer):
 
 
 # MyPage에 들어가는 모든 Serializer를 불러오는 serializer
-class MyPageWrapperSerializer(serializers.ModelSerializer):
+class MyPageWrapperSerializer(DynamicFieldsModelSerializer):
     results = serializers.SerializerMethodField()
     user_id = serializers.CharField(source='username')
 
@@ -164,7 +165,7 @@ class MyPageAllSerializer(serializers.ModelSerializer):
         )
 
     def get_wishlist(self, obj):
-        return TalentShortInfoSerializer(obj.talent_set.all(), many=True).data
+        return TalentShortInfoSerializer(obj.talent_set.with_list_info(), many=True).data
 
     def get_registrations(self, obj):
         if obj.registrations.all().filter(is_verified=False):
@@ -179,18 +180,16 @@ class MyPageAllSerializer(serializers.ModelSerializer):
             return []
 
     def get_talents(self, obj):
-        talents = Talent.objects.filter(tutor__user=obj)
-        return TalentShortInfoSerializer(talents.all(), many=True).data
+        talents = Talent.objects.with_list_info().filter(tutor__user=obj)
+        return TalentShortInfoSerializer(talents, many=True).data
 
     def get_applicants(self, obj):
-        user = obj
-        if hasattr(user, "tutor"):
-            registrations = []
-            for talent in user.tutor.talent_set.all():
-                registrations.extend([item for item in Registration.objects.filter(talent_location__talent=talent)])
-                return MyApplicantsSerializer(registrations, many=True).data
-        else:
+        # 모든 수업의 신청서를 쿼리 한 번으로 (수업별로 조회하지 않음)
+        if not hasattr(obj, "tutor"):
             return []
+        registrations = Registration.objects.filter(talent_location__talent__tutor=obj.tutor).select_related(
+            'talent_location__talent__rating_stats').order_by('-pk')
+        return MyApplicantsSerializer(registrations, many=True).data
 
 
 # ======== talent =========
@@ -241,7 +240,7 @@ class TalentRegistrationWrapperSerializer(serializers.ModelSerializer):
         return obj.get_type_display()
 
 
-class TalentRegistrationSerializer(serializers.ModelSerializer):
+class TalentRegistrationSerializer(DynamicFieldsModelSerializer):
     student = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), source='student.name')
     talent_location = LocationListSerializer(read_only=True)
     day = serializers.SerializerMethodField()
@@ -282,6 +281,8 @@ class TalentRegistrationCreateSerializer(serializers.ModelSerializer):
             'experience_length',
             'message_to_tutor',
         )
+        # (student, talent_location) 중복은 저장 시 DB unique 제약(IntegrityError)으로만 확인한다.
+        validators = []
 
 
 class RegistrationUpdateSerializer(serializers.ModelSerializer):
@@ -1,23 +1,26 @@
+import collections
+
 from django.contrib.auth import get_user_model
 from rest_auth.app_settings import serializers
 from rest_framework import serializers
 
 from member.serializers.user import ReviewUserSerializer
-from talent.models import Review
+from talent.models import Review, TalentRatingStats
 from talent.models import Talent
-from utils import review_average_rate, curriculum_average_rate, timeliness_average_rate, delivery_average_rate, \
-    friendliness_average_rate, readiness_average_rate
+from utils.dynamic_fields import DynamicFieldsModelSerializer
+from utils.review_average_rate import stats_rating_summary
 
 __all__ = (
     'ReviewSerializer',
     'ReviewCreateSerializer',
     'ReviewUpdateSerializer',
+    'ReviewStatsSerializer',
 )
 
 User = get_user_model()
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsModelSerializer):
     talent = serializers.PrimaryKeyRelatedField(queryset=Talent.objects.all(), source='talent.title')
     # name = serializers.PrimaryKeyRelatedField(queryset=GoriUser.objects.all(), source='user.name')
     user = ReviewUserSerializer()
@@ -70,48 +73,36 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
             'friendliness',
             'comment',
         )
-
-
-class AverageRatesSerializer(serializers.ModelSerializer):
-    total = serializers.SerializerMethodField(read_only=True)
-    curriculum = serializers.SerializerMethodField(read_only=True)
-    timeliness = serializers.SerializerMethodField(read_only=True)
-    readiness = serializers.SerializerMethodField(read_only=True)
-    delivery = serializers.SerializerMethodField(read_only=True)
-    friendliness = serializers.SerializerMethodField(read_only=True)
-
-    class Meta:
-        model = Talent
-        fields = (
-            'total',
-            'curriculum',
-            'readiness',
-            'timeliness',
-            'delivery',
-            'friendliness',
-
-        )
-
-    @staticmethod
-    def get_total(obj):
-        return review_average_rate(obj.reviews)
-
-    @staticmethod
-    def get_curriculum(obj):
-        return curriculum_average_rate(obj.reviews)
-
-    @staticmethod
-    def get_timeliness(obj):
-        return timeliness_average_rate(obj.reviews)
-
-    @staticmethod
-    def get_friendliness(obj):
-        return friendliness_average_rate(obj.reviews)
-
-    @staticmethod
-    def get_delivery(obj):
-        return delivery_average_rate(obj.reviews)
+        # (talent, user) 중복은 저장 시 DB unique 제약(IntegrityError)으로만 확인한다.
+        validators = []
+
+
+class AverageRatesSerializer(serializers.Serializer):
+    """
+    talent의 평점 요약. TalentRatingStats 합계로 한 번에 계산한다. (utils.review_average_rate)
+    """
+    total = serializers.FloatField(read_only=True)
+    curriculum = serializers.FloatField(read_only=True)
+    readiness = serializers.FloatField(read_only=True)
+    timeliness = serializers.FloatField(read_only=True)
+    delivery = serializers.FloatField(read_only=True)
+    friendliness = serializers.FloatField(read_only=True)
+
+    def to_representation(self, instance):
+        summary = stats_rating_summary(TalentRatingStats.for_talent(instance))
+        return super(AverageRatesSerializer, self).to_representation(summary)
+
+
+class ReviewStatsSerializer(serializers.Serializer):
+    """
+    talent의 평점 요약과 항목별 별점 분포. TalentRatingStats row 하나로 만든다.
+    """
+    pk = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    average_rates = AverageRatesSerializer(source='*', read_only=True)
+    histograms = serializers.SerializerMethodField(read_only=True)
 
     @staticmethod
-    def get_readiness(obj):
-        return readiness_average_rate(obj.reviews)
+    def get_histograms(obj):
+        stats = TalentRatingStats.for_talent(obj)
+        return collections.OrderedDict((field, stats.histogram(field)) for field in Review.RATING_FIELDS)
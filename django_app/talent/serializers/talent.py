@@ -1,11 +1,14 @@
 import collections
 
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 from member.serializers import TutorSerializer
-from talent.models import Talent, Curriculum, Location
-from utils import review_average_rate, Tutor, get_user_model
-from utils.region_display import region_display
+from talent.models import Talent, Curriculum, Location, TalentRatingStats
+from utils import Tutor, get_user_model
+from utils.dynamic_fields import DynamicFieldsModelSerializer
+from utils.pagination import KeysetPagination
+from utils.review_average_rate import stats_rating_summary
 from .class_image import ClassImageSerializer
 from .curriculum import CurriculumSerializer
 from .location import LocationSerializer
@@ -24,13 +27,11 @@ __all__ = (
 User = get_user_model()
 
 
-class TalentShortInfoSerializer(serializers.ModelSerializer):
+class TalentShortInfoSerializer(DynamicFieldsModelSerializer):
     category = serializers.SerializerMethodField(read_only=True)
     type = serializers.SerializerMethodField(read_only=True)
-    review_count = serializers.SerializerMethodField(read_only=True)
     regions = serializers.SerializerMethodField(read_only=True)
     average_rate = serializers.SerializerMethodField(read_only=True)
-    wishlist_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Talent
@@ -57,27 +58,20 @@ class TalentShortInfoSerializer(serializers.ModelSerializer):
     def get_type(self, obj):
         return obj.get_type_display()
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
-
-    def get_wishlist_count(self, obj):
-        return obj.wishlist_user.count()
-
     def get_regions(self, obj):
         return obj.region_list
 
     @staticmethod
     def get_average_rate(obj):
-        return review_average_rate(obj.reviews)
+        return stats_rating_summary(TalentRatingStats.for_talent(obj))['total']
 
 
-class TalentListSerializer(serializers.ModelSerializer):
+class TalentListSerializer(DynamicFieldsModelSerializer):
     tutor = TutorSerializer(read_only=True)
     category = serializers.SerializerMethodField(read_only=True)
     # category = serializers.ChoiceField(choices=Talent.CATEGORY, write_only=True)
     # type_name = serializers.SerializerMethodField(read_only=True)
     type = serializers.SerializerMethodField(read_only=True)
-    review_count = serializers.SerializerMethodField(read_only=True)
     regions = serializers.SerializerMethodField(read_only=True)
     is_school = serializers.SerializerMethodField(read_only=True)
     average_rate = serializers.SerializerMethodField(read_only=True)
@@ -116,31 +110,21 @@ class TalentListSerializer(serializers.ModelSerializer):
     def get_type(self, obj):
         return obj.get_type_display()
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
-
     def get_regions(self, obj):
         return obj.region_list
 
     def get_is_school(self, obj):
-        is_school = False
-        school_list = [school[1] for school in Location.SCHOOL]
-        for item in obj.region_list:
-            if item in school_list:
-                is_school = True
-                break
-        return is_school
+        return obj.has_school_location
 
     @staticmethod
     def get_average_rate(obj):
-        return review_average_rate(obj.reviews)
+        return stats_rating_summary(TalentRatingStats.for_talent(obj))['total']
 
 
-class TalentShortDetailSerializer(serializers.ModelSerializer):
+class TalentShortDetailSerializer(DynamicFieldsModelSerializer):
     tutor = TutorSerializer(read_only=True)
     category = serializers.SerializerMethodField(read_only=True)
     type = serializers.SerializerMethodField(read_only=True)
-    review_count = serializers.SerializerMethodField(read_only=True)
     average_rates = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -178,15 +162,12 @@ class TalentShortDetailSerializer(serializers.ModelSerializer):
     def get_type(self, obj):
         return obj.get_type_display()
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
-
     @staticmethod
     def get_average_rates(obj):
         return AverageRatesSerializer(obj).data
 
 
-class TalentDetailSerializer(serializers.ModelSerializer):
+class TalentDetailSerializer(DynamicFieldsModelSerializer):
     tutor = TutorSerializer(read_only=True)
     class_images = ClassImageSerializer(many=True, source='classimage_set', read_only=True)
     curriculums = CurriculumSerializer(many=True, source='curriculum_set', read_only=True)
@@ -194,13 +175,15 @@ class TalentDetailSerializer(serializers.ModelSerializer):
     # qna = QuestionSerializer(many=True, source='question_set', read_only=True)
     category = serializers.SerializerMethodField(read_only=True)
     average_rates = serializers.SerializerMethodField(read_only=True)
-    review_count = serializers.SerializerMethodField(read_only=True)
     # category = serializers.ChoiceField(choices=Talent.CATEGORY)
     locations = serializers.SerializerMethodField(read_only=True)
     type = serializers.SerializerMethodField(read_only=True)
     reviews = serializers.SerializerMethodField()
     qna = serializers.SerializerMethodField()
 
+    # 상세 정보에 함께 담는 리뷰 / QnA 개수 (나머지는 next의 리스트 api로)
+    embedded_page_size = 5
+
     class Meta:
         depth = 1
         model = Talent
@@ -235,35 +218,53 @@ class TalentDetailSerializer(serializers.ModelSerializer):
             'reviews',
         )
 
+    def _embedded_page(self, items, count, url_name, obj):
+        """
+        첫 페이지만 담고, 나머지는 리뷰 / QnA 리스트 api를 같은 cursor로 이어서 읽도록 next를 만든다.
+        items는 embedded_page_size + 1 개까지 읽어서 다음 페이지가 있는지 판단한다.
+        """
+        items = list(items)
+        next_url = None
+        if len(items) > self.embedded_page_size:
+            items = items[:self.embedded_page_size]
+            url = reverse(url_name, kwargs={'pk': obj.pk})
+            request = self.context.get('request')
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            next_url = KeysetPagination.next_url_after(url, items[-1].pk)
+        return items, collections.OrderedDict((
+            ('count', count),
+            ('next', next_url),
+        ))
+
     def get_reviews(self, obj):
-        ordered_queryset = obj.reviews.order_by('-pk')
-        return ReviewSerializer(ordered_queryset, many=True).data
+        queryset = obj.reviews.select_related('user').order_by('-pk')[:self.embedded_page_size + 1]
+        items, page = self._embedded_page(queryset, obj.review_count, 'api:talent:review-retrieve', obj)
+        page['results'] = ReviewSerializer(items, many=True).data
+        return page
 
     def get_qna(self, obj):
-        ordered_queryset = obj.question_set.order_by('-pk')
-        return QuestionSerializer(ordered_queryset, many=True).data
+        queryset = obj.question_set.with_replies().order_by('-pk')[:self.embedded_page_size + 1]
+        items, page = self._embedded_page(queryset, obj.question_set.count(), 'api:talent:qna-retrieve', obj)
+        page['results'] = QuestionSerializer(items, many=True).data
+        return page
 
     def get_locations(self, obj):
-        regions = {}
-        for location_item in obj.locations.all():
-            if location_item.region in regions.keys():
-                regions[location_item.region] += 1
-
-
-            else:
-                regions[location_item.region] = 1
-        locationss = []
-        for region_key, value in regions.items():
-            a = collections.OrderedDict()
-            a["region"] = region_display(region_key)
-            a["count"] = value
-            results = []
-            l = Location.objects.filter(talent=obj, region=region_key)
-            for item_l in l:
-                results.append(LocationSerializer(item_l).data)
-            a["results"] = results
-            locationss.append(a)
-        return locationss
+        """
+        location 목록을 한 번만 읽어서 지역별로 묶는다. (지역 수와 관계없이 쿼리 한 번)
+        지역 순서는 location이 처음 나온 순서
+        """
+        grouped = collections.OrderedDict()
+        for location in obj.locations.all():
+            grouped.setdefault(location.region, []).append(location)
+        locations = []
+        for region, items in grouped.items():
+            group = collections.OrderedDict()
+            group["region"] = Location.REGION_DISPLAY.get(region)
+            group["count"] = len(items)
+            group["results"] = LocationSerializer(items, many=True).data
+            locations.append(group)
+        return locations
 
     def get_category(self, obj):
         return obj.get_category_display()
@@ -272,9 +273,6 @@ class TalentDetailSerializer(serializers.ModelSerializer):
     def get_average_rates(obj):
         return AverageRatesSerializer(obj).data
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
-
     def get_type(self, obj):
         return obj.get_type_display()
 
@@ -0,0 +1,248 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from member.models import Tutor, UserActivityCounters
+from talent.models import Talent, TalentSearchDocument, Location, Review, WishList, Registration, Question
+from talent.models import Curriculum, ClassImage, Reply, TalentRatingStats
+from utils.cache_version import TALENT_CATALOG, bump_cache_version_on_commit
+
+
+# ##### 목록 캐시 무효화 #####
+@receiver(post_save, sender=Talent)
+@receiver(post_delete, sender=Talent)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=WishList)
+@receiver(post_delete, sender=WishList)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_talent_catalog_version(sender, **kwargs):
+    # 버전은 DB 밖(캐시)에 있으므로 저장이 commit된 뒤에 올린다.
+    bump_cache_version_on_commit(TALENT_CATALOG)
+
+
+# ##### talent 지역 정보 #####
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def refresh_talent_region_codes(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Talent.objects.filter(pk=instance.talent_id).refresh_region_codes()
+
+
+# ##### 정렬용 카운터 #####
+@receiver(post_save, sender=WishList)
+def increase_wishlist_count(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        Talent.objects.filter(pk=instance.talent_id).increment('wishlist_count')
+
+
+@receiver(post_delete, sender=WishList)
+def decrease_wishlist_count(sender, instance, **kwargs):
+    Talent.objects.filter(pk=instance.talent_id).increment('wishlist_count', -1)
+
+
+# 수강신청 카운터는 commit 후에 갱신한다. transaction 안에서 talent / 튜터 카운터 row를 UPDATE하면
+# 같은 수업의 신청이 그 transaction이 끝날 때까지 모두 줄을 서게 된다. (어긋나면 reconcile 명령으로 다시 계산)
+def change_registration_count(location_id, amount):
+    transaction.on_commit(
+        lambda: Talent.objects.filter(locations=location_id).increment('registration_count', amount))
+
+
+@receiver(post_save, sender=Registration)
+def increase_registration_count(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        change_registration_count(instance.talent_location_id, 1)
+
+
+@receiver(post_delete, sender=Registration)
+def decrease_registration_count(sender, instance, **kwargs):
+    change_registration_count(instance.talent_location_id, -1)
+
+
+# ##### 평점 통계 (TalentRatingStats, Talent.review_count / rating_score) #####
+# view는 리뷰를 transaction.atomic 안에서 저장하고, 삭제(연쇄 삭제 포함)는 Django가 삭제와 post_delete를 한 transaction으로 묶는다.
+@receiver(pre_save, sender=Review)
+def remember_old_rating_values(sender, instance, raw=False, **kwargs):
+    """
+    수정이면 저장 전 점수를 읽어 두고 post_save에서 차이만 반영한다.
+    """
+    instance._old_rating_values = None
+    if raw or instance.pk is None:
+        return
+    instance._old_rating_values = sender.objects.filter(pk=instance.pk).values(*sender.RATING_FIELDS).first()
+
+
+@receiver(post_save, sender=Review)
+def apply_review_rating_stats(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    old_values = getattr(instance, '_old_rating_values', None)
+    if created:
+        TalentRatingStats.objects.add_review(instance)
+    elif old_values is not None and old_values != instance.rating_values:
+        TalentRatingStats.objects.change_review(instance, old_values)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_rating_stats(sender, instance, **kwargs):
+    TalentRatingStats.objects.remove_review(instance)
+
+
+# ##### 장소별 자리 (예약은 RegistrationListCreateView에서) #####
+@receiver(post_delete, sender=Registration)
+def release_location_seat(sender, instance, **kwargs):
+    Location.objects.release_seat(instance.talent_location_id)
+
+
+# ##### 사용자 활동 카운터 (프로필 / 마이페이지) #####
+# 생성은 view에서 transaction.atomic 안에서 저장하고, 삭제는 Django가 삭제와 post_delete를 한 transaction으로 묶는다.
+def change_registration_counters(registration, amount):
+    """
+    튜터는 지금 찾고(연쇄 삭제 중이면 commit 후에는 장소가 없음), 카운터 UPDATE는 commit 후에 한다.
+    """
+    student_id = registration.student_id
+    # Tutor의 pk는 user id
+    tutor_id = Location.objects.filter(pk=registration.talent_location_id).values_list(
+        'talent__tutor_id', flat=True).first()
+
+    def increment():
+        UserActivityCounters.objects.increment(student_id, 'sent_registration_count', amount)
+        if tutor_id is not None:
+            UserActivityCounters.objects.increment(tutor_id, 'received_registration_count', amount)
+    transaction.on_commit(increment)
+
+
+@receiver(post_save, sender=Registration)
+def increase_user_registration_counters(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        change_registration_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Registration)
+def decrease_user_registration_counters(sender, instance, **kwargs):
+    change_registration_counters(instance, -1)
+
+
+@receiver(post_save, sender=WishList)
+@receiver(post_save, sender=Review)
+def increase_user_activity_counter(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        field = 'wishlist_count' if sender is WishList else 'review_count'
+        UserActivityCounters.objects.increment(instance.user_id, field)
+
+
+@receiver(post_delete, sender=WishList)
+@receiver(post_delete, sender=Review)
+def decrease_user_activity_counter(sender, instance, **kwargs):
+    field = 'wishlist_count' if sender is WishList else 'review_count'
+    UserActivityCounters.objects.increment(instance.user_id, field, -1)
+
+
+@receiver(post_save, sender=Talent)
+def increase_user_talent_count(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        UserActivityCounters.objects.increment(instance.tutor_id, 'talent_count')
+
+
+@receiver(post_delete, sender=Talent)
+def decrease_user_talent_count(sender, instance, **kwargs):
+    UserActivityCounters.objects.increment(instance.tutor_id, 'talent_count', -1)
+
+
+# ##### 상세 정보 버전(ETag) #####
+# content_version은 talent row에 있어 변경 내용과 함께 commit되므로 transaction 안에서 올린다.
+# (상세 api는 버전을 먼저 읽고 내용을 읽으므로 새 버전 키에 예전 내용이 캐시되지 않는다)
+@receiver(post_save, sender=Talent)
+def bump_talent_content_version(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    Talent.objects.filter(pk=instance.pk).bump_content_version()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Curriculum)
+@receiver(post_delete, sender=Curriculum)
+@receiver(post_save, sender=ClassImage)
+@receiver(post_delete, sender=ClassImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_related_content_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Talent.objects.filter(pk=instance.talent_id).bump_content_version()
+
+
+@receiver(post_save, sender=Reply)
+@receiver(post_delete, sender=Reply)
+def bump_reply_content_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Talent.objects.filter(question=instance.question_id).bump_content_version()
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def bump_registration_content_version(sender, instance, raw=False, **kwargs):
+    # 상세 정보의 registration_count가 바뀜. registration_count와 같이 commit 후에 (talent row lock을 잡지 않도록)
+    if raw:
+        return
+    location_id = instance.talent_location_id
+    transaction.on_commit(lambda: Talent.objects.filter(locations=location_id).bump_content_version())
+
+
+# 상세 / 목록 응답의 tutor에 들어가는 사용자 필드 (TutorSerializer)
+TUTOR_PROFILE_USER_FIELDS = {'username', 'name', 'nickname', 'profile_image', 'cellphone'}
+
+
+def bump_tutor_talents(tutor_id):
+    # Tutor의 pk는 user id. 튜터가 아니면 바뀌는 row가 없다.
+    if Talent.objects.filter(tutor_id=tutor_id).bump_content_version():
+        bump_cache_version_on_commit(TALENT_CATALOG)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_tutor_profile_content_version(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """
+    튜터 이름, 프로필 사진 등이 바뀌면 튜터 수업의 상세 정보 버전을 올린다. (last_login 만 저장하는 경우 등은 건너뜀)
+    """
+    if created or raw or (update_fields is not None and not TUTOR_PROFILE_USER_FIELDS & set(update_fields)):
+        return
+    bump_tutor_talents(instance.pk)
+
+
+@receiver(post_save, sender=Tutor)
+def bump_tutor_content_version(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # 튜터 인증 여부(is_verified)가 상세 정보에 들어간다.
+    if created or raw or (update_fields is not None and 'is_verified' not in update_fields):
+        return
+    bump_tutor_talents(instance.pk)
+
+
+# ##### 검색 문서 갱신 #####
+@receiver(post_save, sender=Talent)
+def refresh_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    TalentSearchDocument.objects.refresh(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_tutor_search_documents(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    튜터 이름이 검색 대상이므로 이름이 바뀔 수 있는 저장에서만 튜터의 수업 문서를 갱신한다.
+    (로그인 시 last_login 만 저장하는 경우 등은 건너뜀)
+    """
+    if raw or (update_fields is not None and 'name' not in update_fields):
+        return
+    for talent in Talent.objects.filter(tutor__user=instance).select_related('tutor__user'):
+        TalentSearchDocument.objects.refresh(talent)
@@ -2,4 +2,5 @@ from .curriculum import *
 from .qna import *
 from .review import *
 from .talent import *
-from .location import *
\ No newline at end of file
+from .location import *
+from .registration import *
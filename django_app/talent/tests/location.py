@@ -1,8 +1,11 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APILiveServerTestCase
 
 from talent.models import Location
+from talent.serializers import TalentDetailSerializer
 from utils import APITestUserLogin, get_user_model
 
 User = get_user_model()
@@ -66,3 +69,22 @@ class LocationCreateRetriveTest(APILiveServerTestCase, APITestUserLogin):
                 self.assertEqual(response.data["results"][0]["talent_pk"], talent.pk)
                 self.assertIn("region", response.data["results"][0])
                 self.assertIn("day", response.data["results"][0])
+
+
+class TalentDetailLocationTest(APILiveServerTestCase, APITestUserLogin):
+    def test_detail_locations_grouped_by_region_in_one_query(self):
+        user, token = self.obtain_token()
+        tutor = self.register_tutor(user, token)
+        talent = self.create_talent(tutor, token)
+        for region, day in (('KN', 'MO'), ('SNU', 'TU'), ('KN', 'WE'), ('HYU', 'TH')):
+            Location.objects.create(talent=talent, region=region, specific_location='NEGO', day=day,
+                                    time='12-16,18-20')
+
+        serializer = TalentDetailSerializer(talent)
+        with CaptureQueriesContext(connection) as queries:
+            locations = serializer.get_locations(talent)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual([item['region'] for item in locations], ['강남', '서울대', '한양대'])
+        self.assertEqual([item['count'] for item in locations], [2, 1, 1])
+        self.assertEqual([item['day'] for item in locations[0]['results']], ['월', '수'])
+        self.assertEqual(locations[0]['results'][0]['time'], ['12-16', '18-20'])
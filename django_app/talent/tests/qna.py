@@ -3,7 +3,7 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APILiveServerTestCase
 
-from talent.models import Question
+from talent.models import Question, Reply
 from utils import APITestUserLogin, APITestListVerify
 
 User = get_user_model()
@@ -12,6 +12,7 @@ __all__ = (
     'QuestionCreateTest',
     'ReplyCreateTest',
     'QnARetrieveTest',
+    'QnAQueryCountTest',
 )
 
 
@@ -100,3 +101,29 @@ class QnARetrieveTest(APITestListVerify, APITestUserLogin):
         field_list = ['pk', 'user', 'user_image', 'created_date', 'content', 'replies', 'tutor', 'tutor_image']
         self.verify_util(data, field_list)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class QnAQueryCountTest(APITestListVerify, APITestUserLogin):
+    def test_qna_list_query_count_is_fixed(self):
+        """
+        질문 100개 x 답변 3개를 한 페이지로 읽어도 count, 질문(+작성자), 답변(+튜터) 쿼리 3번이어야 한다.
+        """
+        user, user_token = self.obtain_token(2)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        Question.objects.bulk_create([
+            Question(talent=talent, user=user[1], content='question {}'.format(i)) for i in range(100)
+        ])
+        Reply.objects.bulk_create([
+            Reply(question=question, tutor=tutor, content='reply {}'.format(i))
+            for question in Question.objects.filter(talent=talent)
+            for i in range(3)
+        ])
+
+        url = reverse('api:talent:qna-retrieve', kwargs={'pk': talent.pk})
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(len(response.data['results'][0]['replies']), 3)
+        self.assertEqual(response.data['results'][0]['user'], user[1].name)
+        self.assertEqual(response.data['results'][0]['replies'][0]['tutor'], user[0].name)
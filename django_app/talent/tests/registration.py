@@ -1,19 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.reverse import reverse
-from rest_framework.test import APILiveServerTestCase
+from rest_framework.test import APILiveServerTestCase, APIClient
 
-from talent.models import Registration
-from utils import APITestUserLogin
+from talent.models import IdempotencyKey, Location, Registration, Talent
+from utils import APITestUserLogin, multiple_item_error, other_talent_location_error
 
 User = get_user_model()
 
+__all__ = (
+    'RegistrationCreateRetrieveTest',
+    'LocationSeatTest',
+    'RegistrationIdempotencyTest',
+)
+
 
 class RegistrationCreateRetrieveTest(APILiveServerTestCase, APITestUserLogin):
     def test_registration_create(self):
         users, tokens = self.obtain_token(3)
-        tutor = self.create_tutor(users[0], tokens[0])
+        tutor = self.register_tutor(users[0], tokens[0])
         talent = self.create_talent(tutor, tokens[0])
         location = self.create_location(talent, tokens[0])
         message_to_tutor = "잘부탁드립니다"
@@ -41,6 +50,9 @@ class RegistrationCreateRetrieveTest(APILiveServerTestCase, APITestUserLogin):
         tutor = self.register_tutor(users[0], tokens[0])
         talent = self.create_talent(tutor, tokens[0])
         location = self.create_location(talent, tokens[0])
+        # 세 명이 같은 장소에 신청하므로 정원을 늘려둔다.
+        talent.max_number_student = 3
+        talent.save()
         for index, token in enumerate(tokens[1:]):
             self.create_registration(location=location, token=token)
             registration_retrieve_url = reverse('api:talent:registration-retrieve', kwargs={'pk': talent.pk})
@@ -53,3 +65,135 @@ class RegistrationCreateRetrieveTest(APILiveServerTestCase, APITestUserLogin):
         registration_retrieve_url = reverse('api:talent:registration-retrieve', kwargs={'pk': invalid_talent_pk})
         response = self.client.get(registration_retrieve_url, HTTP_AUTHORIZATION='Token ' + tokens[1])
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+class LocationSeatTest(APILiveServerTestCase, APITestUserLogin):
+    def test_concurrent_registrations_do_not_overbook(self):
+        """
+        한 장소에 수백 건의 수강신청이 동시에 들어와도 정원을 넘지 않아야 한다.
+        lock을 오래 기다리는 요청이 있으면 lock_timeout 에러로 실패한다.
+        """
+        user, token = self.obtain_token()
+        tutor = self.register_tutor(user, token)
+        talent = self.create_talent(tutor, token)
+        location = self.create_location(talent, token)
+        Talent.objects.filter(pk=talent.pk).update(max_number_student=9)
+        students = User.objects.bulk_create(
+            [User(username='seat{}'.format(i), name='seat{}'.format(i)) for i in range(200)]
+        )
+        tokens = Token.objects.bulk_create([Token(user=student, key=Token().generate_key()) for student in students])
+        url = reverse('api:talent:registration-create')
+
+        def register(key):
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET lock_timeout = '5s'")
+                response = APIClient().post(url, {'location_pk': location.pk, 'message_to_tutor': 'test'},
+                                            HTTP_AUTHORIZATION='Token ' + key)
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            status_codes = list(executor.map(register, [item.key for item in tokens]))
+
+        self.assertEqual(status_codes.count(status.HTTP_201_CREATED), 9)
+        self.assertEqual(status_codes.count(status.HTTP_400_BAD_REQUEST), 191)
+        location.refresh_from_db()
+        self.assertEqual(location.seats_taken, 9)
+        self.assertEqual(Registration.objects.filter(talent_location=location).count(), 9)
+        talent.refresh_from_db()
+        self.assertTrue(talent.is_soldout)
+
+        # 신청을 지우면 자리가 돌아온다.
+        Registration.objects.filter(talent_location=location).first().delete()
+        location.refresh_from_db()
+        self.assertEqual(location.seats_taken, 8)
+
+    def test_registration_moves_only_within_talent(self):
+        """
+        수강신청은 같은 수업의 다른 장소로만 옮길 수 있고, 옮기면 자리도 함께 옮겨져야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        same_talent = Location.objects.create(talent=talent, region='SNU', specific_location='NEGO', day='TU',
+                                              time='12-16')
+        other = self.create_extra_talent(tutor, title='other', price_per_hour=5000)
+        other_talent = Location.objects.create(talent=other, region='KN', specific_location='NEGO', day='WE',
+                                               time='12-16')
+        registration = self.create_registration(location, tokens[1])
+        url = reverse('api:talent:registration-update', kwargs={'pk': registration.pk})
+
+        response = self.client.patch(url, {'location_pk': other_talent.pk}, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, other_talent_location_error)
+        registration.refresh_from_db()
+        self.assertEqual(registration.talent_location_id, location.pk)
+        other.refresh_from_db()
+        self.assertEqual(other.registration_count, 0)
+
+        response = self.client.patch(url, {'location_pk': same_talent.pk}, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        location.refresh_from_db()
+        same_talent.refresh_from_db()
+        self.assertEqual((location.seats_taken, same_talent.seats_taken), (0, 1))
+        talent.refresh_from_db()
+        self.assertEqual(talent.registration_count, 1)
+
+
+class RegistrationIdempotencyTest(APILiveServerTestCase, APITestUserLogin):
+    def test_retried_registration_is_created_once(self):
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        Talent.objects.filter(pk=talent.pk).update(max_number_student=9)
+        url = reverse('api:talent:registration-create')
+        data = {'location_pk': location.pk, 'message_to_tutor': 'test'}
+
+        # 같은 키로 재전송하면 처음 응답을 그대로 돌려받는다.
+        for _ in range(2):
+            response = self.client.post(url, data, HTTP_AUTHORIZATION='Token ' + tokens[1],
+                                        HTTP_IDEMPOTENCY_KEY='retry-1')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Registration.objects.filter(student=users[1]).count(), 1)
+        location.refresh_from_db()
+        self.assertEqual(location.seats_taken, 1)
+
+        # 키 없이 다시 신청하면 unique 제약으로 중복 에러
+        response = self.client.post(url, data, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, multiple_item_error)
+        location.refresh_from_db()
+        self.assertEqual(location.seats_taken, 1)
+
+    def test_concurrent_retries_with_same_key_are_created_once(self):
+        """
+        같은 Idempotency-Key로 동시에 재전송해도 한 번만 신청되고, 모든 요청이 처음 응답(201)을 받아야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        Talent.objects.filter(pk=talent.pk).update(max_number_student=9)
+        url = reverse('api:talent:registration-create')
+
+        def register(_):
+            try:
+                response = APIClient().post(url, {'location_pk': location.pk, 'message_to_tutor': 'test'},
+                                            HTTP_AUTHORIZATION='Token ' + tokens[1],
+                                            HTTP_IDEMPOTENCY_KEY='concurrent-1')
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            status_codes = list(executor.map(register, range(10)))
+
+        self.assertEqual(status_codes, [status.HTTP_201_CREATED] * 10)
+        self.assertEqual(Registration.objects.filter(student=users[1]).count(), 1)
+        self.assertEqual(IdempotencyKey.objects.filter(user=users[1]).count(), 1)
+        location.refresh_from_db()
+        self.assertEqual(location.seats_taken, 1)
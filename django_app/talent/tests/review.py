@@ -1,13 +1,24 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APILiveServerTestCase
 
-from talent.models import Review
-from utils import APITestUserLogin, APITestListVerify
+from talent.models import Review, Talent, TalentRatingStats
+from utils import APITestUserLogin, APITestListVerify, multiple_item_error
+from utils.review_average_rate import rating_summary, bulk_rating_summary, stats_rating_summary
 
 __all__ = (
     'ReviewCreateTest',
-    'ReviewRetrieveTest'
+    'ReviewRetrieveTest',
+    'TalentRatingStatsTest',
+    'TalentDetailEmbeddedReviewTest',
+    'RatingSummaryTest',
+    'ReviewStatsTest',
+    'ReviewImportTest',
 )
 
 
@@ -48,10 +59,12 @@ class ReviewCreateTest(APILiveServerTestCase, APITestUserLogin):
                 self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
                 self.assertIn('detail', response.data)
 
-                # 지금은 리뷰가 여러개 달림
-                # response = self.client.post(url, data, format="multipart", HTTP_AUTHORIZATION='Token ' + user_token[1])
-                # self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-                # self.assertEqual(Review.objects.count(), 1)
+        # 같은 수업에 두 번째 리뷰는 unique 제약으로 거절
+        data['talent_pk'] = talent.pk
+        response = self.client.post(url, data, format="multipart", HTTP_AUTHORIZATION='Token ' + user_token[1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, multiple_item_error)
+        self.assertEqual(Review.objects.count(), 1)
 
 
 class ReviewRetrieveTest(APITestUserLogin, APITestListVerify):
@@ -73,3 +86,192 @@ class ReviewRetrieveTest(APITestUserLogin, APITestListVerify):
         # url = reverse('api:talent:review-retrieve', kwargs={'pk': 555})
         # response = self.client.get(url)
         # self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TalentRatingStatsTest(APILiveServerTestCase, APITestUserLogin):
+    def test_rating_stats_follow_review_changes(self):
+        user, user_token = self.obtain_token(2)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        review = self.create_review(talent, user_token[1])
+
+        stats = TalentRatingStats.objects.get(talent=talent)
+        self.assertEqual(stats.review_count, 1)
+        self.assertEqual(stats.curriculum_sum, 5)
+        self.assertEqual(stats_rating_summary(stats)['total'], 5)
+        talent.refresh_from_db()
+        self.assertEqual(talent.review_count, 1)
+        # (3.0 * 5 + 5) / (5 + 1)
+        self.assertAlmostEqual(talent.rating_score, 20 / 6)
+
+        url = reverse('api:talent:review-update', kwargs={'pk': review.pk})
+        response = self.client.patch(url, {'curriculum': 3}, HTTP_AUTHORIZATION='Token ' + user_token[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats.refresh_from_db()
+        self.assertEqual(stats.review_count, 1)
+        self.assertEqual(stats.curriculum_sum, 3)
+        self.assertEqual(stats_rating_summary(stats)['curriculum'], 3)
+
+        url = reverse('api:talent:review-delete', kwargs={'pk': review.pk})
+        response = self.client.delete(url, HTTP_AUTHORIZATION='Token ' + user_token[1])
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        stats.refresh_from_db()
+        self.assertEqual(stats.review_count, 0)
+        self.assertEqual(stats.curriculum_sum, 0)
+        self.assertEqual(stats_rating_summary(stats)['total'], 0)
+        talent.refresh_from_db()
+        self.assertEqual(talent.review_count, 0)
+        self.assertAlmostEqual(talent.rating_score, Talent.RATING_PRIOR_MEAN)
+
+    def test_rating_stats_follow_orm_and_cascade_deletes(self):
+        """
+        api를 거치지 않은 저장, 수정, 연쇄 삭제에서도 평점 통계가 갱신되어야 한다.
+        """
+        user, user_token = self.obtain_token(3)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        review = Review.objects.create(talent=talent, user=user[1], curriculum=4, readiness=4, timeliness=4,
+                                       delivery=4, friendliness=4)
+        Review.objects.create(talent=talent, user=user[2], curriculum=2, readiness=2, timeliness=2, delivery=2,
+                              friendliness=2)
+        stats = TalentRatingStats.objects.get(talent=talent)
+        self.assertEqual((stats.review_count, stats.curriculum_sum), (2, 6))
+
+        review.curriculum = 1
+        review.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.review_count, stats.curriculum_sum), (2, 3))
+        self.assertEqual(stats.curriculum_histogram, [1, 1, 0, 0, 0])
+
+        # 사용자를 지우면 리뷰도 함께 지워진다.
+        user[1].delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.review_count, stats.curriculum_sum), (1, 2))
+        talent.refresh_from_db()
+        self.assertEqual(talent.review_count, 1)
+
+        # 수업을 지우면 통계 row도 함께 지워지고 다시 만들어지지 않는다.
+        talent.delete()
+        self.assertFalse(TalentRatingStats.objects.filter(talent_id=stats.talent_id).exists())
+
+
+class TalentDetailEmbeddedReviewTest(APITestUserLogin, APITestListVerify):
+    def test_detail_embeds_first_review_page(self):
+        """
+        상세 정보에는 최신 리뷰 5개만 담고, next로 리뷰 리스트 api의 나머지를 이어서 읽을 수 있어야 한다.
+        """
+        user, user_token = self.obtain_token(8)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        # 한 사람당 리뷰 하나
+        reviews = [Review.objects.create(talent=talent, user=user[i], comment=str(i)) for i in range(1, 8)]
+
+        url = reverse('api:talent:detail-all', kwargs={'pk': talent.pk})
+        response = self.client.get(url)
+        page = response.data['reviews']
+        self.assertEqual([item['pk'] for item in page['results']], [review.pk for review in reviews[:1:-1]])
+        self.assertIsNotNone(page['next'])
+
+        response = self.client.get(page['next'])
+        self.assertEqual([item['pk'] for item in response.data['results']], [reviews[1].pk, reviews[0].pk])
+        self.assertIsNone(response.data['next'])
+
+        # 허용하지 않은 정렬(관련 객체)은 무시하고 기본 정렬(-pk)로 cursor를 만든다.
+        url = reverse('api:talent:review-retrieve', kwargs={'pk': talent.pk})
+        response = self.client.get(url, {'ordering': 'user', 'page_size': 4})
+        self.assertEqual([item['pk'] for item in response.data['results']], [review.pk for review in reviews[:2:-1]])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['pk'] for item in response.data['results']], [review.pk for review in reviews[2::-1]])
+
+
+class RatingSummaryTest(APILiveServerTestCase, APITestUserLogin):
+    def test_rating_summary_single_query(self):
+        user, user_token = self.obtain_token(3)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        empty_talent = self.create_extra_talent(tutor, title='empty', is_verified=False)
+        Review.objects.create(talent=talent, user=user[1], curriculum=5, readiness=4, timeliness=3, delivery=2,
+                              friendliness=1)
+        Review.objects.create(talent=talent, user=user[2], curriculum=4, readiness=4, timeliness=4, delivery=4,
+                              friendliness=4)
+
+        with self.assertNumQueries(1):
+            summary = rating_summary(Review.objects.filter(talent=talent))
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['curriculum'], 4.5)
+        self.assertEqual(summary['friendliness'], 2.5)
+        self.assertEqual(summary['total'], 3.5)
+
+        with self.assertNumQueries(1):
+            summaries = bulk_rating_summary([talent.pk, empty_talent.pk])
+        self.assertEqual(summaries[talent.pk], summary)
+        self.assertEqual(summaries[empty_talent.pk]['count'], 0)
+        self.assertEqual(summaries[empty_talent.pk]['total'], 0)
+
+
+class ReviewStatsTest(APILiveServerTestCase, APITestUserLogin):
+    def test_histogram_follows_review_changes(self):
+        user, user_token = self.obtain_token(2)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        review = self.create_review(talent, user_token[1])
+        url = reverse('api:talent:review-stats', kwargs={'pk': talent.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['review_count'], 1)
+        self.assertEqual(response.data['average_rates']['total'], 5)
+        self.assertEqual(list(response.data['histograms']['curriculum'].values()), [0, 0, 0, 0, 1])
+
+        update_url = reverse('api:talent:review-update', kwargs={'pk': review.pk})
+        self.client.patch(update_url, {'curriculum': 2}, HTTP_AUTHORIZATION='Token ' + user_token[1])
+        response = self.client.get(url)
+        self.assertEqual(list(response.data['histograms']['curriculum'].values()), [0, 1, 0, 0, 0])
+        self.assertEqual(list(response.data['histograms']['readiness'].values()), [0, 0, 0, 0, 1])
+
+        # 일괄 재계산 결과가 증분 갱신 결과와 같아야 한다.
+        expected = response.data
+        call_command('reconcile_rating_stats', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.client.get(url).data, expected)
+
+        delete_url = reverse('api:talent:review-delete', kwargs={'pk': review.pk})
+        self.client.delete(delete_url, HTTP_AUTHORIZATION='Token ' + user_token[1])
+        response = self.client.get(url)
+        self.assertEqual(response.data['review_count'], 0)
+        self.assertEqual(list(response.data['histograms']['curriculum'].values()), [0, 0, 0, 0, 0])
+
+
+class ReviewImportTest(APILiveServerTestCase, APITestUserLogin):
+    def test_import_skips_duplicates_and_invalid_rows(self):
+        user, user_token = self.obtain_token(3)
+        tutor = self.register_tutor(user[0], user_token[0])
+        talent = self.create_talent(tutor, user_token[0])
+        rows = [
+            {'id': 1, 'talent': talent.pk, 'user': user[1].pk, 'curriculum': 4, 'comment': 'a',
+             'created_date': '2016-03-01T12:00:00'},
+            {'id': 2, 'talent': talent.pk, 'user': user[2].pk, 'curriculum': 2},
+            # 같은 수업, 같은 사용자의 두 번째 리뷰
+            {'id': 3, 'talent': talent.pk, 'user': user[1].pk, 'curriculum': 5},
+            {'id': 4, 'talent': 987654, 'user': user[1].pk},
+            {'id': 5, 'talent': talent.pk, 'user': user[2].pk, 'curriculum': 9},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write('\n'.join(json.dumps(row) for row in rows))
+        self.addCleanup(os.remove, f.name)
+
+        devnull = open(os.devnull, 'w')
+        self.addCleanup(devnull.close)
+        for _ in range(2):
+            # 두 번째 실행은 import_key 제약으로 모두 건너뜀
+            call_command('import_reviews_qna', 'review', f.name, source='partner', chunk_size=2,
+                         stdout=devnull, stderr=devnull)
+            self.assertEqual(Review.objects.filter(talent=talent).count(), 2)
+
+        review = Review.objects.get(import_key='partner:1')
+        self.assertEqual(review.created_date.year, 2016)
+        stats = TalentRatingStats.objects.get(talent=talent)
+        self.assertEqual(stats.review_count, 2)
+        self.assertEqual(stats.curriculum_sum, 6)
+        talent.refresh_from_db()
+        self.assertEqual(talent.review_count, 2)
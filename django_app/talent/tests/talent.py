@@ -1,10 +1,17 @@
+import os
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APILiveServerTestCase
 
-from talent.models import Talent
+from talent.apis import TalentSuggestView
+from talent.models import Talent, Location, Registration
 from utils import APITestUserLogin, image_upload, Tutor, APITestListVerify
+from utils.cache_version import TALENT_CATALOG, get_cache_version
 
 User = get_user_model()
 
@@ -12,6 +19,17 @@ __all__ = (
     'TutorRegisterTest',
     'TalentCreateTest',
     'TalentListTest',
+    'TalentListQueryCountTest',
+    'TalentListResponseCacheTest',
+    'TalentDetailETagTest',
+    'TalentRegionCodesTest',
+    'TalentSparseFieldsetTest',
+    'TalentListOrderingTest',
+    'TalentSuggestTest',
+    'TrendingTalentTest',
+    'TalentBatchTest',
+    'TalentDetailCacheTest',
+    'MyApplicantsTest',
 )
 
 
@@ -152,9 +170,9 @@ class TalentListTest(APITestUserLogin, APITestListVerify):
         average_reates = list(response.data['average_rates'])
         location = list(response.data['locations'][0])
         curriculums = list(response.data['curriculums'][0])
-        qna = list(response.data['qna'][0])
-        reply = list(response.data['qna'][0]['replies'][0])
-        reviews = list(response.data['reviews'][0])
+        qna = list(response.data['qna']['results'][0])
+        reply = list(response.data['qna']['results'][0]['replies'][0])
+        reviews = list(response.data['reviews']['results'][0])
         data_list = [tutor, average_reates, location, curriculums, qna, reply, reviews]
         for data_item in data_list:
             data.extend(data_item)
@@ -187,3 +205,435 @@ class TalentListTest(APITestUserLogin, APITestListVerify):
         url = reverse('api:talent:detail-all', kwargs={'pk': 999})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TalentListQueryCountTest(APITestUserLogin, APITestListVerify):
+    def test_talent_list_query_count_is_constant(self):
+        """
+        talent 수가 늘어나도 리스트 api의 쿼리 수는 변하지 않아야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        self.create_location(talent, user_token)
+        url = reverse('api:talent:list')
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 1)
+
+        for i in range(5):
+            extra_talent = self.create_extra_talent(tutor, title='extra{}'.format(i))
+            Location.objects.create(talent=extra_talent, region='SNU', specific_location='NEGO', day='MO',
+                                    time='12-16')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(single.captured_queries), len(many.captured_queries))
+
+
+class TalentListResponseCacheTest(APITestUserLogin, APITestListVerify):
+    def test_anonymous_talent_list_is_cached_until_catalog_changes(self):
+        """
+        비로그인 리스트 응답은 캐시되고, talent가 바뀌면 새 응답을 돌려줘야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        self.create_location(talent, user_token)
+        url = reverse('api:talent:list')
+        self.client.get(url + '?category=COM&title=test')
+
+        # 파라미터 순서가 달라도 같은 캐시를 사용한다.
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(url + '?title=test&category=COM')
+        self.assertEqual(len(cached.captured_queries), 0)
+        self.assertEqual(response.data['results'][0]['title'], talent.title)
+
+        talent.title = 'test changed'
+        talent.save()
+        response = self.client.get(url + '?title=test&category=COM')
+        self.assertEqual(response.data['results'][0]['title'], 'test changed')
+
+    def test_catalog_version_is_bumped_after_commit(self):
+        """
+        목록 캐시 버전은 저장한 transaction이 commit된 뒤에 올라가야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        version = get_cache_version(TALENT_CATALOG)
+        with transaction.atomic():
+            talent.title = 'test changed'
+            talent.save()
+            self.assertEqual(get_cache_version(TALENT_CATALOG), version)
+        self.assertNotEqual(get_cache_version(TALENT_CATALOG), version)
+
+
+class TalentDetailETagTest(APITestUserLogin, APITestListVerify):
+    def test_talent_detail_etag(self):
+        """
+        If-None-Match가 현재 ETag와 같으면 304, 관련 정보가 바뀌면 새 ETag와 200을 돌려줘야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        etags = {}
+        for url_name in ('api:talent:detail-short', 'api:talent:detail-all'):
+            url = reverse(url_name, kwargs={'pk': talent.pk})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etags[url_name] = response['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url_name])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # 자신의 수업에는 리뷰를 쓸 수 없으므로 다른 사용자가 작성
+        self.create_review(talent, tokens[1])
+        for url_name in ('api:talent:detail-short', 'api:talent:detail-all'):
+            url = reverse(url_name, kwargs={'pk': talent.pk})
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url_name])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etags[url_name])
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_talent_detail_etag_follows_tutor_profile(self):
+        """
+        튜터의 이름이 바뀌면 예전 ETag로 304를 받지 않고, 캐시된 상세 정보도 새 이름이어야 한다.
+        """
+        user, token = self.obtain_token(1)
+        tutor = self.register_tutor(user, token)
+        talent = self.create_talent(tutor, token)
+        url = reverse('api:talent:detail-all', kwargs={'pk': talent.pk})
+        etag = self.client.get(url)['ETag']
+
+        # 로그인 등 다른 필드만 저장할 때는 버전이 그대로
+        user.save(update_fields=['last_login'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        user.name = 'renamed tutor'
+        user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tutor']['name'], 'renamed tutor')
+
+    def test_talent_detail_etag_follows_wishlist(self):
+        """
+        위시리스트를 토글하면 content_version은 그대로여도 예전 ETag로 304를 받지 않아야 한다. (is_wished가 바뀜)
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        url = reverse('api:talent:detail-all', kwargs={'pk': talent.pk})
+        auth = 'Token ' + tokens[1]
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+        etag = response['ETag']
+        self.assertFalse(response.data['is_wished'])
+
+        self.client.get(reverse('api:talent:wishlist-toggle', kwargs={'pk': talent.pk}), HTTP_AUTHORIZATION=auth)
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_wished'])
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=auth, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class TalentRegionCodesTest(APITestUserLogin, APITestListVerify):
+    def test_region_codes_follow_location_writes(self):
+        """
+        location 생성/삭제 시 talent의 region_codes, has_school_location이 갱신되어야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        Location.objects.create(talent=talent, region='KN', specific_location='NEGO', day='MO', time='12-16')
+        school = Location.objects.create(talent=talent, region='SNU', specific_location='NEGO', day='TU',
+                                         time='12-16')
+        talent.refresh_from_db()
+        self.assertEqual(talent.region_codes, ['KN', 'SNU'])
+        self.assertTrue(talent.has_school_location)
+
+        url = reverse('api:talent:list')
+        response = self.client.get(url, {'region': 'SNU'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertTrue(response.data['results'][0]['is_school'])
+        self.assertEqual(response.data['results'][0]['regions'], ['강남', '서울대'])
+
+        stale_talent = Talent.objects.get(pk=talent.pk)
+        school.delete()
+        talent.refresh_from_db()
+        self.assertEqual(talent.region_codes, ['KN'])
+        self.assertFalse(talent.has_school_location)
+        response = self.client.get(url, {'region': 'SNU'})
+        self.assertEqual(response.data['count'], 0)
+
+        # 예전에 읽은 인스턴스를 저장해도 갱신된 지역 정보를 덮어쓰지 않아야 한다.
+        stale_talent.title = 'changed'
+        stale_talent.save()
+        talent.refresh_from_db()
+        self.assertEqual(talent.region_codes, ['KN'])
+
+
+class TalentSparseFieldsetTest(APITestUserLogin, APITestListVerify):
+    def test_fields_and_omit(self):
+        """
+        ?fields= 로 지정한 필드만, ?omit= 로 지정한 필드를 뺀 나머지만 돌려줘야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        self.create_location(talent, user_token)
+
+        url = reverse('api:talent:list')
+        response = self.client.get(url, {'fields': 'pk,title,cover_image'})
+        self.assertEqual(set(response.data['results'][0]), {'pk', 'title', 'cover_image'})
+
+        response = self.client.get(url, {'omit': 'tutor,average_rate'})
+        self.assertNotIn('tutor', response.data['results'][0])
+        self.assertNotIn('average_rate', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+
+        url = reverse('api:talent:detail-short', kwargs={'pk': talent.pk})
+        response = self.client.get(url, {'fields': 'pk,title'})
+        self.assertEqual(set(response.data), {'pk', 'title'})
+
+
+class TalentListOrderingTest(APITestUserLogin, APITestListVerify):
+    def test_ordering_by_counters(self):
+        """
+        위시리스트 / 리뷰에 따라 talent 카운터가 갱신되고 ?ordering= 으로 정렬되어야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        other = self.create_extra_talent(tutor, title='other', price_per_hour=5000)
+
+        url = reverse('api:talent:wishlist-toggle', kwargs={'pk': talent.pk})
+        self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        talent.refresh_from_db()
+        self.assertEqual(talent.wishlist_count, 1)
+
+        url = reverse('api:talent:list')
+        response = self.client.get(url, {'ordering': '-wishlist_count'})
+        self.assertEqual([item['pk'] for item in response.data['results']], [talent.pk, other.pk])
+        response = self.client.get(url, {'ordering': 'price_per_hour'})
+        self.assertEqual([item['pk'] for item in response.data['results']], [other.pk, talent.pk])
+
+        self.create_review(other, tokens[1])
+        response = self.client.get(url, {'ordering': '-rating_score'})
+        self.assertEqual([item['pk'] for item in response.data['results']], [other.pk, talent.pk])
+        self.assertEqual(response.data['results'][0]['review_count'], 1)
+
+        url = reverse('api:talent:wishlist-toggle', kwargs={'pk': talent.pk})
+        self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        talent.refresh_from_db()
+        self.assertEqual(talent.wishlist_count, 0)
+
+    def test_cursor_pages_through_equal_values(self):
+        """
+        정렬 값이 같은 수업이 페이지보다 많아도 (값, pk) cursor로 빠짐없이, 중복 없이 넘어가야 한다.
+        """
+        users, tokens = self.obtain_token(1)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        for number in range(5):
+            self.create_extra_talent(tutor, title='same price {}'.format(number), price_per_hour=5000)
+        expected = list(Talent.objects.order_by('price_per_hour', 'pk').values_list('pk', flat=True))
+
+        pages = []
+        url = reverse('api:talent:list')
+        params = {'ordering': 'price_per_hour', 'page_size': 2, 'fields': 'pk'}
+        while url is not None:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            url, params = response.data['next'], None
+        self.assertEqual([item['pk'] for page in pages for item in page['results']], expected)
+        self.assertEqual(len(pages), 3)
+
+        # 마지막 페이지의 previous는 두 번째 페이지와 같아야 한다.
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual(response.data['results'], pages[1]['results'])
+
+        # 내림차순은 pk도 내림차순
+        response = self.client.get(reverse('api:talent:list'), {'ordering': '-price_per_hour', 'page_size': 4})
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['pk'] for item in response.data['results']], expected[::-1][4:])
+
+
+class TalentSuggestTest(APITestUserLogin, APITestListVerify):
+    def setUp(self):
+        TalentSuggestView.suggest_cache.clear()
+
+    def test_suggest_prefix_and_limit(self):
+        """
+        인증된 수업 중 제목이 prefix로 시작하는 것만 돌려주고, ?limit= 은 1 ~ max_limit으로 제한되어야 한다.
+        """
+        users, tokens = self.obtain_token(1)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        for title, is_verified in (('Python basic', True), ('python advanced', True), ('Python draft', False),
+                                   ('learn python', True)):
+            self.create_extra_talent(tutor, title=title, price_per_hour=5000, is_verified=is_verified)
+        url = reverse('api:talent:suggest')
+
+        # 대소문자 구분 없는 prefix 일치. 중간에 포함된 제목과 미인증 수업은 제외
+        response = self.client.get(url, {'prefix': 'PYTH'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({item['title'] for item in response.data['results']}, {'Python basic', 'python advanced'})
+        self.assertEqual(set(response.data['results'][0]), {'pk', 'title', 'category'})
+
+        # 오타가 있는 prefix는 일치하지 않는다.
+        response = self.client.get(url, {'prefix': 'pyhton'})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get(url, {'prefix': ''})
+        self.assertEqual(response.data['results'], [])
+
+        # limit 범위 밖의 값은 1 ~ max_limit으로, 숫자가 아니면 기본값으로
+        response = self.client.get(url, {'prefix': 'python', 'limit': -1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(url, {'prefix': 'python', 'limit': 0})
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(url, {'prefix': 'python', 'limit': 1000})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(url, {'prefix': 'python', 'limit': 'many'})
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class TrendingTalentTest(APITestUserLogin, APITestListVerify):
+    def test_trending_talents(self):
+        """
+        compute_trending 실행 후 최근 활동이 있는 인증된 수업만 순위대로 돌려줘야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        quiet = self.create_extra_talent(tutor, title='quiet', price_per_hour=5000)
+        url = reverse('api:talent:wishlist-toggle', kwargs={'pk': quiet.pk})
+        self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.create_registration(location, tokens[1])
+
+        url = reverse('api:talent:trending')
+        response = self.client.get(url)
+        self.assertEqual(response.data, [])
+
+        call_command('compute_trending', stdout=open(os.devnull, 'w'))
+        response = self.client.get(url)
+        # 수강신청(가중치 3)이 위시리스트(가중치 1)보다 높은 점수
+        self.assertEqual([item['pk'] for item in response.data], [talent.pk, quiet.pk])
+
+        # limit은 1 ~ max_limit
+        response = self.client.get(url, {'limit': -1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['pk'] for item in response.data], [talent.pk])
+        response = self.client.get(url, {'limit': 1000})
+        self.assertEqual(len(response.data), 2)
+
+
+class TalentBatchTest(APITestUserLogin, APITestListVerify):
+    def test_talent_batch(self):
+        """
+        여러 talent를 id 기준으로 돌려주고, 없는 id는 missing에 담아야 한다. 쿼리 수는 개수와 무관해야 한다.
+        """
+        user, user_token = self.obtain_token()
+        tutor = self.register_tutor(user, user_token)
+        talent = self.create_talent(tutor, user_token)
+        url = reverse('api:talent:detail-batch')
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url, {'ids': '{},999'.format(talent.pk)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results']), [str(talent.pk)])
+        self.assertEqual(response.data['results'][str(talent.pk)]['title'], talent.title)
+        self.assertEqual(response.data['missing'], [999])
+
+        ids = [talent.pk]
+        for i in range(5):
+            ids.append(self.create_extra_talent(tutor, title='extra{}'.format(i), is_verified=False).pk)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url, {'ids': ','.join(str(pk) for pk in ids)})
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(single.captured_queries), len(many.captured_queries))
+
+        response = self.client.get(url, {'ids': ','.join(str(pk) for pk in range(1, 102))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TalentDetailCacheTest(APITestUserLogin, APITestListVerify):
+    def test_detail_payload_cache_and_user_overlay(self):
+        """
+        공통 정보는 캐시되어 같은 버전이면 다시 계산하지 않고, 유저별 정보는 매번 새로 계산해야 한다.
+        """
+        users, tokens = self.obtain_token(2)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        url = reverse('api:talent:detail-all', kwargs={'pk': talent.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['user'], 'Login Required')
+        self.assertFalse(response.data['is_wished'])
+
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(url)
+        # content_version 조회 한 번
+        self.assertEqual(len(cached.captured_queries), 1)
+
+        wish_url = reverse('api:talent:wishlist-toggle', kwargs={'pk': talent.pk})
+        self.client.get(wish_url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.data['user']['pk'], users[1].pk)
+        self.assertTrue(response.data['is_wished'])
+        self.assertFalse(response.data['is_registered'])
+
+        talent.title = 'changed title'
+        talent.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['title'], 'changed title')
+
+
+class MyApplicantsTest(APITestUserLogin, APITestListVerify):
+    def test_applicants_filter_and_query_count(self):
+        """
+        tutor의 모든 수업 신청서를 한 번에 페이지로 읽고, 승인 여부 / 수업으로 거를 수 있어야 한다.
+        수업 / 신청서 수가 늘어나도 쿼리 수는 같아야 한다.
+        """
+        users, tokens = self.obtain_token(4)
+        tutor = self.register_tutor(users[0], tokens[0])
+        talent = self.create_talent(tutor, tokens[0])
+        location = self.create_location(talent, tokens[0])
+        Registration.objects.create(student=users[1], talent_location=location, message_to_tutor='test')
+        url = reverse('api:member:my-applicants')
+        auth = 'Token ' + tokens[0]
+        with CaptureQueriesContext(connection) as single:
+            response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(len(response.data['results']), 1)
+
+        for i in range(3):
+            extra_talent = self.create_extra_talent(tutor, title='extra{}'.format(i), is_verified=False)
+            extra_location = Location.objects.create(talent=extra_talent, region='SNU', specific_location='NEGO',
+                                                     day='MO', time='12-16')
+            for student in users[1:]:
+                Registration.objects.create(student=student, talent_location=extra_location,
+                                            message_to_tutor='test', is_verified=student == users[3])
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len(single.captured_queries), len(many.captured_queries))
+
+        response = self.client.get(url, {'is_verified': 'true'}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertTrue(all(item['is_verified'] for item in response.data['results']))
+
+        response = self.client.get(url, {'talent': talent.pk}, HTTP_AUTHORIZATION=auth)
+        self.assertEqual([item['talent']['pk'] for item in response.data['results']], [talent.pk])
+
+        # tutor가 아닌 사용자는 빈 목록
+        response = self.client.get(url, HTTP_AUTHORIZATION='Token ' + tokens[1])
+        self.assertEqual(response.data['results'], [])
@@ -25,7 +25,7 @@ urlpatterns = [
     url(r'^delete/curriculum/(?P<pk>[0-9]+)/$', apis.CurriculumDeleteView.as_view()),
     url(r'^delete/class-image/(?P<pk>[0-9]+)/$', apis.ClassImageDeleteView.as_view()),
     url(r'^delete/registration/(?P<pk>[0-9]+)/$', apis.RegistrationDeleteView.as_view()),
-    url(r'^delete/review/(?P<pk>[0-9]+)/$', apis.ReviewDeleteView.as_view()),
+    url(r'^delete/review/(?P<pk>[0-9]+)/$', apis.ReviewDeleteView.as_view(), name='review-delete'),
     url(r'^delete/question/(?P<pk>[0-9]+)/$', apis.QuestionDeleteView.as_view()),
     url(r'^delete/reply/(?P<pk>[0-9]+)/$', apis.ReplyDeleteView.as_view()),
 
@@ -33,17 +33,25 @@ urlpatterns = [
     url(r'^list/$', apis.TalentListCreateView.as_view(), name='list'),
     url(r'^list/unverified/$', apis.UnverifiedTalentListView.as_view(), name='list-unverified'),
 
+    # ##### 인기 급상승 #####
+    url(r'^trending/$', apis.TrendingTalentListView.as_view(), name='trending'),
+
+    # ##### 검색어 자동완성 #####
+    url(r'^suggest/$', apis.TalentSuggestView.as_view(), name='suggest'),
+
     # ##### 전체보기 #####
     url(r'^detail-all/(?P<pk>[0-9]+)/$', apis.TalentDetailView.as_view(), name='detail-all'),
 
     # ##### 요약 #####
     url(r'^detail/(?P<pk>[0-9]+)/$', apis.TalentShortDetailView.as_view(), name='detail-short'),
+    url(r'^detail/batch/$', apis.TalentBatchView.as_view(), name='detail-batch'),
     url(r'^detail/(?P<pk>[0-9]+)/location/$', apis.LocationListCreateView.as_view(), name='location-retrieve'),
     url(r'^detail/(?P<pk>[0-9]+)/class-image/$', apis.ClassImageListCreateView.as_view(), name='classimage-retrieve'),
     url(r'^detail/(?P<pk>[0-9]+)/curriculum/$', apis.CurriculumListCreateView.as_view(), name='curriculum-retrieve'),
     url(r'^detail/(?P<pk>[0-9]+)/registration/$', apis.RegistrationListCreateView.as_view(),
         name='registration-retrieve'),
     url(r'^detail/(?P<pk>[0-9]+)/review/$', apis.ReviewListCreateView.as_view(), name='review-retrieve'),
+    url(r'^detail/(?P<pk>[0-9]+)/review/stats/$', apis.ReviewStatsView.as_view(), name='review-stats'),
     url(r'^detail/(?P<pk>[0-9]+)/qna/$', apis.QuestionListCreateView.as_view(), name='qna-retrieve'),
 
     # ##### 위시리스트 추가/삭제 #####
@@ -57,6 +65,6 @@ urlpatterns = [
     url(r'^update/(?P<pk>[0-9]+)/review/$', apis.ReviewUpdateView.as_view(), name='review-update'),
     url(r'^update/(?P<pk>[0-9]+)/question/$', apis.QuestionUpdateView.as_view(), name='question-update'),
     url(r'^update/(?P<pk>[0-9]+)/reply/$', apis.ReplyUpdateView.as_view(), name='reply-update'),
-    url(r'^update/(?P<pk>[0-9]+)/registration/$', apis.RegistrationUpdateView.as_view(), name='reply-update'),
+    url(r'^update/(?P<pk>[0-9]+)/registration/$', apis.RegistrationUpdateView.as_view(), name='registration-update'),
     url(r'^update/(?P<pk>[0-9]+)/location/$', apis.LocationUpdateView.as_view(), name='location-update'),
 ]
@@ -3,6 +3,12 @@ from .review_average_rate import *
 from .verify import *
 from .testcase import *
 from .custom_permission import *
+from .authentication import *
 from .upload import *
 from .remove_all_but_numbers import *
 from .response_message import *
+from .ttl_cache import *
+from .cache_version import *
+from .response_cache import *
+from .etag import *
+from .dynamic_fields import *
@@ -0,0 +1,25 @@
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import authentication, exceptions
+
+__all__ = (
+    'TokenAuthentication',
+)
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """
+    토큰을 조회할 때 사용자와 활동 카운터(UserActivityCounters)를 함께 join 한다.
+    request.user를 UserSerializer로 출력해도 카운터를 위한 쿼리가 더 나가지 않는다.
+    """
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user__activity_counters').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return token.user, token
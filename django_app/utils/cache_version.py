@@ -0,0 +1,47 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+__all__ = (
+    'TALENT_CATALOG',
+    'get_cache_version',
+    'bump_cache_version',
+    'bump_cache_version_on_commit',
+)
+
+# talent, location, review, wishlist, registration, question 이 바뀌면 올라가는 버전.
+# 캐시 키에 포함해서 이전 캐시를 무효화한다.
+TALENT_CATALOG = 'talent_catalog'
+
+
+def _version_key(name):
+    return 'cache_version:{}'.format(name)
+
+
+def get_cache_version(name):
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # 캐시에서 지워진 뒤 예전 버전 번호가 재사용되지 않도록 현재 시각으로 시작한다.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(name):
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def bump_cache_version_on_commit(name):
+    """
+    현재 transaction이 commit된 뒤에 버전을 올린다. (transaction 밖이면 바로)
+    commit 전에 올리면 동시에 들어온 요청이 예전 row를 읽어 새 버전 키로 캐시해 버린다.
+    """
+    transaction.on_commit(lambda: bump_cache_version(name))
@@ -0,0 +1,83 @@
+import hashlib
+
+from rest_framework import permissions
+from rest_framework import serializers
+
+__all__ = (
+    'DynamicFieldsModelSerializer',
+    'sparse_fieldset',
+    'sparse_fieldset_key',
+    'rendered_fields',
+)
+
+
+def _split(value):
+    if value is None:
+        return None
+    return set(name.strip() for name in value.split(',') if name.strip()) or None
+
+
+def sparse_fieldset(request):
+    """
+    GET 요청의 ?fields=a,b / ?omit=c 를 (fields, omit) set으로 돌려준다. 없으면 None
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None, None
+    query_params = getattr(request, 'query_params', request.GET)
+    return _split(query_params.get('fields')), _split(query_params.get('omit'))
+
+
+def sparse_fieldset_key(request):
+    """
+    응답 모양이 fieldset에 따라 달라지므로 ETag 등에 붙일 짧은 키. fieldset이 없으면 ''
+    """
+    fields, omit = sparse_fieldset(request)
+    if fields is None and omit is None:
+        return ''
+    normalized = '{}|{}'.format(','.join(sorted(fields or ())), ','.join(sorted(omit or ())))
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest()[:8]
+
+
+def rendered_fields(request, serializer_class):
+    """
+    요청에 대해 serializer_class가 실제로 출력할 필드 이름 set
+    view에서 queryset의 select_related / annotate를 필요한 만큼만 붙일 때 사용한다.
+    """
+    names = set(serializer_class.Meta.fields)
+    fields, omit = sparse_fieldset(request)
+    if fields:
+        names &= fields
+    if omit:
+        names -= omit
+    return names
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes additional `fields` / `omit` arguments that
+    control which fields should be displayed.
+
+    인자가 없으면 context의 request에서 ?fields= / ?omit= 를 읽는다.
+    (view가 context를 넘기는 최상위 serializer에만 적용되고, 중첩 serializer는 그대로)
+    빠진 SerializerMethodField는 실행되지 않는다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Don't pass the 'fields' / 'omit' args up to the superclass
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+
+        # Instantiate the superclass normally
+        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
+
+        if fields is None and omit is None:
+            fields, omit = sparse_fieldset(self._context.get('request'))
+
+        existing = set(self.fields.keys())
+        if fields:
+            # Drop any fields that are not specified in the `fields` argument.
+            for field_name in existing - set(fields):
+                self.fields.pop(field_name)
+        if omit:
+            for field_name in existing & set(omit):
+                self.fields.pop(field_name, None)
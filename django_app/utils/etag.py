@@ -0,0 +1,36 @@
+from rest_framework import status
+from rest_framework.response import Response
+
+__all__ = (
+    'make_etag',
+    'etag_matches',
+    'not_modified_response',
+)
+
+
+def make_etag(*parts):
+    """
+    make_etag('talent', 3, 12) -> '"talent-3-12"'
+    빈 값('', None)은 건너뛴다.
+    """
+    return '"{}"'.format('-'.join(str(part) for part in parts if part not in ('', None)))
+
+
+def etag_matches(request, etag):
+    """
+    If-None-Match 헤더에 etag가 포함되어 있는지 확인한다. (weak 비교, W/ 접두어 무시)
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [item.strip() for item in header.split(',')]
+    return any(candidate[2:] == etag if candidate.startswith('W/') else candidate == etag
+               for candidate in candidates)
+
+
+def not_modified_response(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
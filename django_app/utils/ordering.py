@@ -35,4 +35,27 @@ class MyCustomOrdering(OrderingFilter):
         if ordering:
             return queryset.order_by(*ordering)
 
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+class SearchRankOrderingFilter(OrderingFilter):
+    """
+    검색어(?q=)가 있고 ?ordering= 이 없으면 검색 관련도(rank) 순으로 정렬한다.
+    view의 queryset에 rank가 annotate 되어 있어야 한다.
+
+    값이 같은 row의 순서가 페이지마다 바뀌지 않도록 pk가 없으면 pk를 마지막 정렬 기준으로 붙인다.
+    (첫 번째 정렬 기준과 같은 방향이어야 (컬럼, id) 인덱스 하나로 읽을 수 있다)
+    """
+    search_param = 'q'
+    search_ordering = ('-rank', '-pk')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super(SearchRankOrderingFilter, self).get_ordering(request, queryset, view)
+        if ordering and not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering = tuple(ordering) + ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get(self.search_param):
+            return self.search_ordering
+        return super(SearchRankOrderingFilter, self).get_default_ordering(view)
@@ -1,9 +1,25 @@
-from rest_framework.pagination import CursorPagination, LimitOffsetPagination, PageNumberPagination
+import hashlib
+from base64 import b64decode
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+from django.utils import six
+from django.utils.six.moves.urllib import parse as urlparse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination, PageNumberPagination, \
+    _positive_int, _reverse_ordering
+from rest_framework.response import Response
+
+from .cache_version import TALENT_CATALOG, get_cache_version
 
 __all__ = (
     'TalentPagination',
     'RegistrationPagination',
     'LargeResultsSetPagination',
+    'KeysetPagination',
 )
 
 
@@ -21,3 +37,190 @@ class LargeResultsSetPagination(PageNumberPagination):
 class RegistrationPagination(CursorPagination):
     page_size = 2
     ordering = 'joined_date'
+
+
+class KeysetPagination(CursorPagination):
+    """
+    (정렬 기준 값, pk)로 다음 페이지를 찾는 keyset 페이지네이션. (기본 -pk)
+    OFFSET을 쓰지 않으므로 몇 번째 페이지든 첫 페이지와 비용이 같다.
+    view에 OrderingFilter가 있으면 그 첫 번째 정렬 기준을 따르고, 같은 방향의 pk를 두 번째 기준으로 붙인다.
+    (값이 같은 row가 많아도 cursor가 항상 한 row를 가리키고, (컬럼, id) 인덱스를 그대로 읽는다)
+
+    전체 개수(count)는 쿼리별로 캐시해서 함께 돌려준다.
+    (talent 관련 데이터가 바뀌면 TALENT_CATALOG 버전이 올라가 캐시가 무효화됨)
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-pk'
+    count_cache_timeout = 60
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_keyset_ordering(self.get_ordering(request, queryset, view))
+        self.position_attrs = [self._position_attr(queryset.model, field.lstrip('-')) for field in self.ordering]
+        self.cursor = self.decode_cursor(request)
+
+        # 이전 페이지는 반대 순서로 읽은 뒤 뒤집는다.
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = self.filter_after(queryset, ordering, self.cursor.position)
+
+        # 다음 페이지가 있는지 알기 위해 한 개 더 읽는다.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    @staticmethod
+    def get_keyset_ordering(ordering):
+        """
+        첫 번째 정렬 기준 + 같은 방향의 pk (정렬 기준이 pk면 pk만)
+        """
+        first = ordering[0]
+        if first.lstrip('-') in ('pk', 'id'):
+            return (first,)
+        return first, '-pk' if first.startswith('-') else 'pk'
+
+    def filter_after(self, queryset, ordering, position):
+        """
+        ordering 순서에서 position(정렬 기준 값들) 다음에 오는 row만 남긴다.
+        모델 컬럼은 (컬럼, id) row 비교로 걸러서 인덱스 범위 검색이 되도록 한다.
+        """
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        model = queryset.model
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        pk = self._to_python(model._meta.pk, position[-1])
+        if len(ordering) == 1:
+            return queryset.filter(**{'pk__' + lookup: pk})
+
+        name = ordering[0].lstrip('-')
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            # annotate 한 값(검색 rank 등)은 컬럼이 아니므로 OR 조건으로 거른다.
+            value = self._to_python(annotation.output_field, position[0])
+            return queryset.filter(
+                Q(**{'{}__{}'.format(name, lookup): value}) | Q(**{name: value, 'pk__' + lookup: pk})
+            )
+
+        field = model._meta.get_field(name)
+        value = self._to_python(field, position[0])
+        qn = connection.ops.quote_name
+        where = '({table}.{column}, {table}.{pk}) {operator} (%s, %s)'.format(
+            table=qn(model._meta.db_table),
+            column=qn(field.column),
+            pk=qn(model._meta.pk.column),
+            operator='<' if lookup == 'lt' else '>',
+        )
+        return queryset.extra(where=[where], params=[value, pk])
+
+    def _to_python(self, field, value):
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        """
+        cursor의 position은 정렬 기준 값 목록 (p=<값>&p=<pk>)
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = urlparse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if 'p' not in tokens:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=tokens['p'])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    @staticmethod
+    def _position_attr(model, name):
+        """
+        cursor에 넣을 값의 속성 이름. 관련 객체(FK)로 정렬하면 객체 대신 id 값(user_id 등)을 읽는다.
+        """
+        if name == 'pk':
+            return name
+        try:
+            return getattr(model._meta.get_field(name), 'attname', name)
+        except FieldDoesNotExist:
+            # annotate 한 값 (검색 rank 등)
+            return name
+
+    def _get_position_from_instance(self, instance, ordering):
+        return [six.text_type(getattr(instance, attr)) for attr in self.position_attrs]
+
+    def get_count(self, queryset):
+        try:
+            sql = str(queryset.query)
+        except EmptyResultSet:
+            return 0
+        cache_key = 'keyset_count:{}:{}'.format(
+            get_cache_version(TALENT_CATALOG),
+            hashlib.md5(sql.encode('utf-8')).hexdigest(),
+        )
+        count = cache.get(cache_key)
+        if count is None:
+            count = queryset.count()
+            cache.set(cache_key, count, self.count_cache_timeout)
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    @classmethod
+    def next_url_after(cls, url, position):
+        """
+        다른 응답에 먼저 보여준 첫 페이지(마지막 정렬 기준 값이 position) 다음부터 읽는 url
+        (기본 정렬 -pk 기준. position은 마지막 row의 pk)
+        """
+        paginator = cls()
+        paginator.base_url = url
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=[str(position)]))
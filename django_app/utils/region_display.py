@@ -2,6 +2,4 @@ from talent.models import Location
 
 
 def region_display(region):
-    for item in Location.SCHOOL+Location.AREA:
-        if item[0] == region:
-            return item[1]
\ No newline at end of file
+    return Location.REGION_DISPLAY.get(region)
@@ -0,0 +1,43 @@
+import hashlib
+
+from django.core.cache import cache
+
+from .cache_version import get_cache_version
+
+__all__ = (
+    'normalize_query_params',
+    'get_cached_response',
+    'set_cached_response',
+)
+
+
+def normalize_query_params(query_params):
+    """
+    파라미터 순서만 다른 쿼리 스트링이 같은 캐시 키를 갖도록 정리한다.
+    ?title=a&category=b  ->  category=b&title=a
+    """
+    items = []
+    for key in sorted(query_params.keys()):
+        for value in sorted(query_params.getlist(key)):
+            items.append('{}={}'.format(key, value))
+    return '&'.join(items)
+
+
+def _response_cache_key(prefix, version_name, query_params):
+    return 'response_cache:{}:{}:{}'.format(
+        prefix,
+        get_cache_version(version_name),
+        hashlib.md5(normalize_query_params(query_params).encode('utf-8')).hexdigest(),
+    )
+
+
+def get_cached_response(prefix, version_name, query_params):
+    """
+    캐시된 응답 data를 돌려준다. 없으면 None
+    version_name의 버전이 올라가면 키가 바뀌므로 이전 응답은 다시 쓰이지 않는다.
+    """
+    return cache.get(_response_cache_key(prefix, version_name, query_params))
+
+
+def set_cached_response(prefix, version_name, query_params, data, timeout):
+    cache.set(_response_cache_key(prefix, version_name, query_params), data, timeout)
@@ -6,6 +6,14 @@ multiple_item_error = {
     'detail': '이미 등록되었습니다.'
 }
 
+class_full_error = {
+    'detail': '모집 인원이 모두 찼습니다.'
+}
+
+other_talent_location_error = {
+    'detail': '같은 수업의 다른 장소로만 옮길 수 있습니다.'
+}
+
 authorization_error = {
     'detail': '권한이 없습니다.'
 }
@@ -1,83 +1,67 @@
-def review_average_rate(reviews):
-    sum_of_average = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            sum_of_average += review.average_rate
-        try:
-            return_value = sum_of_average / reviews.count()
-        except ZeroDivisionError:
-            return 0
+import collections
 
-        return round(return_value, 1)
-    else:
-        return 0
+from django.db.models import Avg, Count
 
+from talent.models import Review
 
-def curriculum_average_rate(reviews):
-    curriculum_sum = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            curriculum_sum += review.curriculum
-        try:
-            return_value = curriculum_sum / reviews.count()
-        except ZeroDivisionError:
-            return 0
-        return round(return_value, 1)
-    else:
-        return 0
+__all__ = (
+    'RATING_SUMMARY_FIELDS',
+    'rating_summary',
+    'bulk_rating_summary',
+    'stats_rating_summary',
+)
 
+# 평점 요약의 key 순서. total은 다섯 항목 평균의 평균
+RATING_SUMMARY_FIELDS = ('total',) + Review.RATING_FIELDS + ('count',)
 
-def readiness_average_rate(reviews):
-    readiness_sum = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            readiness_sum += review.readiness
-        try:
-            return_value = readiness_sum / reviews.count()
-        except ZeroDivisionError:
-            return 0
-        return round(return_value, 1)
-    else:
-        return 0
 
+def _summary(count, averages):
+    """
+    :param averages: {항목: 평균(반올림 전)}
+    """
+    summary = collections.OrderedDict((field, 0) for field in RATING_SUMMARY_FIELDS)
+    if not count:
+        return summary
+    summary['total'] = round(sum(averages.values()) / len(Review.RATING_FIELDS), 1)
+    for field in Review.RATING_FIELDS:
+        summary[field] = round(averages[field], 1)
+    summary['count'] = count
+    return summary
 
-def timeliness_average_rate(reviews):
-    timeliness_sum = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            timeliness_sum += review.timeliness
-        try:
-            return_value = timeliness_sum / reviews.count()
-        except ZeroDivisionError:
-            return 0
-        return round(return_value, 1)
-    else:
-        return 0
 
+def _aggregates():
+    aggregates = {field: Avg(field) for field in Review.RATING_FIELDS}
+    aggregates['count'] = Count('pk')
+    return aggregates
 
-def delivery_average_rate(reviews):
-    delivery_sum = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            delivery_sum += review.delivery
-        try:
-            return_value = delivery_sum / reviews.count()
-        except ZeroDivisionError:
-            return 0
-        return round(return_value, 1)
-    else:
-        return 0
 
+def rating_summary(reviews):
+    """
+    Review queryset의 항목별 평균, 전체 평균, 개수를 aggregate 쿼리 한 번으로 구한다.
+    """
+    row = reviews.order_by().aggregate(**_aggregates())
+    return _summary(row['count'], {field: row[field] for field in Review.RATING_FIELDS})
 
-def friendliness_average_rate(reviews):
-    friendliness_sum = 0
-    if reviews.count() > 0:
-        for review in reviews.all():
-            friendliness_sum += review.friendliness
-        try:
-            return_value = friendliness_sum / reviews.count()
-        except ZeroDivisionError:
-            return 0
-        return round(return_value, 1)
-    else:
-        return 0
+
+def bulk_rating_summary(talent_ids):
+    """
+    여러 talent의 평점 요약을 GROUP BY 쿼리 한 번으로 구한다. {talent_id: 요약}
+    리뷰가 없는 talent는 0으로 채운 요약
+    """
+    summaries = {talent_id: _summary(0, {}) for talent_id in talent_ids}
+    rows = Review.objects.filter(talent_id__in=list(summaries)).order_by().values('talent').annotate(**_aggregates())
+    for row in rows:
+        summaries[row['talent']] = _summary(row['count'], {field: row[field] for field in Review.RATING_FIELDS})
+    return summaries
+
+
+def stats_rating_summary(stats):
+    """
+    리뷰 저장 시 갱신되는 TalentRatingStats 합계로 같은 요약을 만든다. (쿼리 없음)
+    """
+    if stats.review_count <= 0:
+        return _summary(0, {})
+    return _summary(stats.review_count, {
+        field: getattr(stats, '{}_sum'.format(field)) / stats.review_count
+        for field in Review.RATING_FIELDS
+    })
@@ -115,6 +115,27 @@ class APITestUserLogin(object):
         talent.save()
         return talent
 
+    def create_extra_talent(self, tutor, **overrides):
+        """
+        api를 거치지 않고 같은 튜터의 수업을 하나 더 만든다. (인증된 수업, cover_image는 튜터의 다른 수업 것을 사용)
+        :param overrides: 기본값 대신 쓸 Talent 필드 값
+        """
+        data = {
+            'tutor': tutor,
+            'title': 'extra',
+            'category': 'COM',
+            'tutor_info': 'test',
+            'class_info': 'test',
+            'price_per_hour': 10000,
+            'hours_per_class': 1,
+            'number_of_class': 10,
+            'is_verified': True,
+        }
+        data.update(overrides)
+        if 'cover_image' not in data:
+            data['cover_image'] = Talent.objects.filter(tutor=tutor).values_list('cover_image', flat=True).first()
+        return Talent.objects.create(**data)
+
     def create_location(self, talent, token=None):
         region = 'KN'
         day = "MO"
@@ -0,0 +1,43 @@
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = (
+    'TTLCache',
+)
+
+
+class TTLCache(object):
+    """
+    프로세스 내부에서만 쓰는 작은 LRU + TTL 캐시.
+    자주 들어오는 검색어처럼 짧게 재사용되는 값을 DB 조회 없이 돌려주기 위해 사용한다.
+    """
+
+    def __init__(self, ttl=30, max_size=1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()